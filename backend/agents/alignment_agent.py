@@ -1,4 +1,5 @@
 from agents.base import BaseAgent, AgentResult
+from agents.llm import generate_text, agenerate_text
 from utils.manim_cleaner import clean_manim_code
 from utils.prompts import build_alignment_prompt
 
@@ -11,8 +12,17 @@ class AlignmentAgent(BaseAgent):
     def run(self, manim_code: str) -> AgentResult:
         try:
             prompt = build_alignment_prompt(manim_code)
-            response = self.model.generate_content(prompt)
-            fixed = clean_manim_code(response.text or manim_code)
+            text = generate_text(self.model, "align", prompt)
+            fixed = clean_manim_code(text or manim_code)
+            return AgentResult(True, fixed)
+        except Exception as e:
+            return AgentResult(False, error=str(e))
+
+    async def arun(self, manim_code: str) -> AgentResult:
+        try:
+            prompt = build_alignment_prompt(manim_code)
+            text = await agenerate_text(self.model, "align", prompt)
+            fixed = clean_manim_code(text or manim_code)
             return AgentResult(True, fixed)
         except Exception as e:
             return AgentResult(False, error=str(e))
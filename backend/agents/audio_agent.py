@@ -1,24 +1,167 @@
-import uuid, os
+import uuid, os, re, subprocess, tempfile, time, threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from agents.base import BaseAgent, AgentResult
+from storage.file_lru import materialize
+from storage.tts_cache import segment_key, segment_path, get_segment, save_segment
 from elevenlabs import save
 
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "4"))
+AUDIO_TASK_TTL = 600
+
+VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+MODEL_ID = "eleven_multilingual_v2"
+
+# Concurrent ElevenLabs requests across all narrations; keep it within the plan's concurrency limit
+TTS_PARALLELISM = int(os.getenv("TTS_PARALLELISM", "4"))
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> list:
+    # One cache entry per sentence, so a short phrase is reused no matter what follows it
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
 class AudioAgent(BaseAgent):
     name = "AudioAgent"
 
     def __init__(self, elevenlabs_client, audio_dir):
         self.client = elevenlabs_client
         self.audio_dir = audio_dir
+        self._executor = ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="tts")
+        self._segments = ThreadPoolExecutor(max_workers=max(1, TTS_PARALLELISM), thread_name_prefix="tts-segment")
+        self._tasks = {}
+        self._lock = threading.Lock()
 
     def run(self, text: str) -> AgentResult:
+        # Sentences are synthesised concurrently and joined, so latency tracks the longest sentence
         try:
-            audio = self.client.text_to_speech.convert(
-                voice_id="21m00Tcm4TlvDq8ikWAM",
-                model_id="eleven_multilingual_v2",
-                text=text
-            )
+            sentences = split_sentences(text)
+            if not sentences:
+                return AgentResult(False, error="Audio script is empty")
+
+            previous = [None, *sentences[:-1]]
+            following = [*sentences[1:], None]
+            segments = list(self._segments.map(self._segment, sentences, previous, following))
             fname = f"audio_{uuid.uuid4().hex}.mp3"
             path = os.path.join(self.audio_dir, fname)
-            save(audio, path)
+            self._concat(segments, path)
             return AgentResult(True, path)
         except Exception as e:
             return AgentResult(False, error=str(e))
+
+    def _segment(self, text: str, previous: str = None, following: str = None) -> str:
+        # Sentences repeated across narrations are synthesised once; the neighbours are only
+        # sent as context for prosody, so they stay out of the cache key
+        key = segment_key(VOICE_ID, MODEL_ID, text)
+        cached = get_segment(key)
+        if cached:
+            return cached
+
+        audio = self.client.text_to_speech.convert(
+            voice_id=VOICE_ID,
+            model_id=MODEL_ID,
+            text=text,
+            previous_text=previous,
+            next_text=following
+        )
+        path = segment_path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        save(audio, tmp)
+        os.replace(tmp, path)
+        save_segment(key)
+        return path
+
+    def _concat(self, segments: list, output_path: str):
+        if len(segments) == 1:
+            materialize(segments[0], output_path)
+            return
+
+        # Segments are linked into a private directory first, so cache eviction cannot remove one mid-join
+        with tempfile.TemporaryDirectory(prefix="tts_") as workdir:
+            listing = os.path.join(workdir, "segments.txt")
+            with open(listing, "w", encoding="utf-8") as f:
+                for i, segment in enumerate(segments):
+                    local = os.path.join(workdir, f"{i}.mp3")
+                    materialize(segment, local)
+                    f.write(f"file '{local}'\n")
+
+            # The concat demuxer copies the MP3 frames as they are: no re-encode, no generation loss
+            cmd = [
+                "ffmpeg",
+                "-y",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", listing,
+                "-c", "copy",
+                output_path
+            ]
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def start(self, text: str) -> str:
+        # Synthesis runs in the background so the render branch never waits on TTS
+        task_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._tasks[task_id] = (self._executor.submit(self.run, text), time.time(), text)
+        return task_id
+
+    def start_when_ready(self, script) -> str:
+        # `script` is a future for narration still being generated; synthesis is queued the
+        # moment it resolves, and a failed or cancelled script becomes a failed audio result
+        task_id = uuid.uuid4().hex
+        task = Future()
+
+        def synthesize(ready):
+            if ready.cancelled() or ready.exception():
+                error = "Narration was cancelled" if ready.cancelled() else str(ready.exception())
+                task.set_result(AgentResult(False, error=error))
+                return
+
+            text = ready.result()
+            with self._lock:
+                if task_id in self._tasks:
+                    self._tasks[task_id] = (task, self._tasks[task_id][1], text)
+            self._executor.submit(self.run, text).add_done_callback(lambda done: task.set_result(done.result()))
+
+        with self._lock:
+            self._prune()
+            self._tasks[task_id] = (task, time.time(), None)
+        script.add_done_callback(synthesize)
+        return task_id
+
+    def has_task(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._tasks
+
+    def script(self, task_id: str, timeout: float = None):
+        # Streamed narration is recorded before its synthesis finishes, so waiting on the task is enough
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if not task:
+            return None
+
+        try:
+            task[0].result(timeout)
+        except FutureTimeout:
+            return None
+        with self._lock:
+            task = self._tasks.get(task_id)
+        return task[2] if task else None
+
+    def result(self, task_id: str, timeout: float = None) -> AgentResult:
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+
+        if not task:
+            return AgentResult(False, error="Unknown audio task")
+
+        try:
+            return task[0].result(timeout)
+        except FutureTimeout:
+            return AgentResult(False, error="Narration was not ready in time")
+
+    def _prune(self):
+        # Tasks whose render branch failed are never collected
+        cutoff = time.time() - AUDIO_TASK_TTL
+        for task_id, (future, started, _) in list(self._tasks.items()):
+            if future.done() and started < cutoff:
+                del self._tasks[task_id]
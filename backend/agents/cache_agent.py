@@ -1,32 +1,126 @@
 import hashlib
+import os
+import threading
 from storage.cache import get_cached_result, save_cached_result
+from storage.similarity_index import prompt_index
+from utils.prompt_normalizer import prompt_cache_key
+
+_stats = {"hits": 0, "similar_hits": 0, "misses": 0, "pipeline_hits": 0, "writes": 0}
+_stats_lock = threading.Lock()
+
+def _record(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+def cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+    return stats
+
+def _content_address(path: str) -> str:
+    # Artifacts are stored under the hash of their bytes so identical outputs share one file
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    ext = os.path.splitext(path)[1]
+    target = os.path.join(os.path.dirname(path), f"{digest.hexdigest()}{ext}")
+
+    if os.path.abspath(target) == os.path.abspath(path):
+        return target
+
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.replace(path, target)
+    return target
+
+def lookup_cache(key: str):
+    cached = get_cached_result(f"result_{key}")
+    if not cached or not os.path.exists(cached["video_path"]):
+        return None
+
+    if cached.get("audio_path") and not os.path.exists(cached["audio_path"]):
+        cached["audio_path"] = None
+
+    cached["cache_key"] = key
+    return cached
+
+def lookup_similar(prompt: str):
+    match = prompt_index.query(prompt)
+    if not match:
+        return None
+    return lookup_cache(match[0])
+
+def find_cached_result(prompt: str, allow_similar: bool = True):
+    cached = lookup_cache(prompt_cache_key(prompt))
+    if cached:
+        _record("hits")
+        return cached
+
+    cached = lookup_similar(prompt) if allow_similar else None
+    _record("similar_hits" if cached else "misses")
+    return cached
 
 def cache_agent(state):
-    prompt = state["prompt"]
-    key = hashlib.sha256(prompt.encode()).hexdigest()
+    key = prompt_cache_key(state["prompt"])
+
+    cached = lookup_cache(key)
+    if not cached and state.get("allow_similar", True):
+        cached = lookup_similar(state["prompt"])
 
-    cached = get_cached_result(key)
     if cached:
+        _record("pipeline_hits")
         return {
-            **state,
+            "cache_key": key,
+            "cache_hit": True,
             "manim_code": cached["manim_code"],
-            "transcript": cached["transcript"],
-            "video_path": cached["video_path"]
+            "audio_script": cached.get("audio_script"),
+            "final_video_path": cached["video_path"],
+            "audio_path": cached.get("audio_path"),
+            "video_tier": cached.get("tier", "preview")
         }
 
-    state["cache_key"] = key
-    return state
-
+    return {"cache_key": key, "cache_hit": False}
 
 def cache_writeback_agent(state):
-    if state.get("video_path"):
-        save_cached_result(
-            state["cache_key"],
-            {
-                "manim_code": state["manim_code"],
-                "transcript": state["transcript"],
-                "video_path": state["video_path"],
-                "audio_path": state.get("audio_path")
-            }
-        )
-    return state
+    video_path = state.get("final_video_path") or state.get("video_path")
+    if state.get("error") or not video_path or not os.path.exists(video_path):
+        return {}
+
+    video_path = _content_address(video_path)
+    audio_path = state.get("audio_path")
+    if audio_path and os.path.exists(audio_path):
+        audio_path = _content_address(audio_path)
+
+    save_cached_result(
+        f"result_{state['cache_key']}",
+        {
+            "prompt": state["prompt"],
+            "manim_code": state["manim_code"],
+            "audio_script": state.get("audio_script"),
+            "video_path": video_path,
+            "audio_path": audio_path,
+            "tier": "preview"
+        }
+    )
+    prompt_index.add(state["prompt"], state["cache_key"])
+    _record("writes")
+
+    return {
+        "final_video_path": video_path,
+        "audio_path": audio_path
+    }
+
+def promote_cached_video(key: str, video_path: str, tier: str):
+    # The new file is complete and content-addressed before the entry points at it
+    cached = get_cached_result(f"result_{key}")
+    if not cached:
+        return None
+
+    video_path = _content_address(video_path)
+    save_cached_result(f"result_{key}", {**cached, "video_path": video_path, "tier": tier})
+    return video_path
@@ -1,6 +1,8 @@
 from agents.base import BaseAgent, AgentResult
+from agents.llm import generate_text, agenerate_text
 from utils.prompts import build_fix_prompt
 from utils.manim_cleaner import clean_manim_code
+from utils.error_details import format_error_details
 
 class FixAgent(BaseAgent):
     name = "FixAgent"
@@ -13,16 +15,31 @@ class FixAgent(BaseAgent):
             if not state.get("error") or not state.get("manim_code"):
                 return AgentResult(False, error="No error or code available to fix")
 
-            prompt = build_fix_prompt(
-                original_code=state["manim_code"],
-                error_output=state["error"],
-                topic=state["prompt"]
-            )
+            text = generate_text(self.model, "fix", self._prompt(state))
+            fixed_code = clean_manim_code(text or state["manim_code"])
 
-            response = self.model.generate_content(prompt)
-            fixed_code = clean_manim_code(response.text or state["manim_code"])
+            return AgentResult(True, fixed_code)
+
+        except Exception as e:
+            return AgentResult(False, error=str(e))
+
+    async def arun(self, state: dict) -> AgentResult:
+        try:
+            if not state.get("error") or not state.get("manim_code"):
+                return AgentResult(False, error="No error or code available to fix")
+
+            text = await agenerate_text(self.model, "fix", self._prompt(state))
+            fixed_code = clean_manim_code(text or state["manim_code"])
 
             return AgentResult(True, fixed_code)
 
         except Exception as e:
-            return AgentResult(False, error=str(e))
\ No newline at end of file
+            return AgentResult(False, error=str(e))
+
+    def _prompt(self, state: dict) -> str:
+        details = state.get("error_details")
+        return build_fix_prompt(
+            original_code=state["manim_code"],
+            error_output=format_error_details(details) if details else state["error"],
+            topic=state["prompt"]
+        )
\ No newline at end of file
@@ -1,57 +1,138 @@
+import asyncio
 import re
+import threading
+import time
 from agents.base import BaseAgent, AgentResult
+from agents.llm import generate_text, agenerate_text, astream_text
 from utils.prompts import build_gemini_prompt
 from utils.manim_cleaner import clean_manim_code
+from utils.section_stream import SectionStream
 
 class GeminiManimAgent(BaseAgent):
     name = "GeminiManimAgent"
 
     def __init__(self, model):
         self.model = model
+        self._lock = threading.Lock()
+        self._stream_stats = {"streams": 0, "early_handoffs": 0, "handoff_seconds": 0.0, "stream_seconds": 0.0}
 
     def run(self, topic: str) -> AgentResult:
         try:
-            prompt = build_gemini_prompt(topic)
-            response = self.model.generate_content(prompt)
-            text = response.text or ""
-            manim_pattern = r"===MANIM_CODE===\s*(.*?)===AUDIO_SCRIPT==="
-            manim_match = re.search(manim_pattern, text, re.DOTALL)
-
-            audio_pattern = r"===AUDIO_SCRIPT===\s*(.*)"
-            audio_match = re.search(audio_pattern, text, re.DOTALL)
-
-            if not manim_match or not audio_match:
-                fallback_manim = re.search(r"MANIM_CODE:\s*```python(.*?)```", text, re.DOTALL | re.IGNORECASE)
-                fallback_audio = re.search(r"AUDIO_SCRIPT:\s*(.*)", text, re.DOTALL | re.IGNORECASE)
-                
-                if fallback_manim and fallback_audio:
-                     manim_match = fallback_manim
-                     audio_match = fallback_audio
-                else:
-                    return AgentResult(
-                        False,
-                        error="Gemini output missing required sections (===MANIM_CODE=== or ===AUDIO_SCRIPT===)"
-                    )
-
-            raw_code = manim_match.group(1).strip()
-            audio_script = audio_match.group(1).strip()
-            if raw_code.startswith("```"):
-                lines = raw_code.split('\n')
-                if lines[0].strip().startswith("```"):
-                    lines = lines[1:]
-                if lines and lines[-1].strip() == "```":
-                    lines = lines[:-1]
-                raw_code = "\n".join(lines).strip()
-
-            manim_code = clean_manim_code(raw_code)
+            text = generate_text(self.model, "gemini", build_gemini_prompt(topic)) or ""
+            return self._parse(text)
+        except Exception as e:
+            return AgentResult(False, error=str(e))
 
+    async def arun(self, topic: str) -> AgentResult:
+        try:
+            text = await agenerate_text(self.model, "gemini", build_gemini_prompt(topic)) or ""
+            return self._parse(text)
+        except Exception as e:
+            return AgentResult(False, error=str(e))
+
+    async def astream(self, topic: str) -> AgentResult:
+        # Returns as soon as the code section closes; data["narration"] is a task that resolves
+        # to the audio script once the rest of the response has streamed in
+        try:
+            started = time.perf_counter()
+            chunks = astream_text(self.model, "gemini", build_gemini_prompt(topic)).__aiter__()
+            sections = SectionStream()
+
+            async for chunk in chunks:
+                if sections.feed(chunk):
+                    break
+            else:
+                # The markers never appeared; the full-response parser still knows the fallback format
+                elapsed = time.perf_counter() - started
+                self._record(elapsed, elapsed, early=False)
+                result = self._parse(sections.text)
+                if result.success:
+                    narration = asyncio.get_running_loop().create_future()
+                    narration.set_result(result.data.pop("audio_script"))
+                    result.data["narration"] = narration
+                return result
+
+            handoff = time.perf_counter() - started
             return AgentResult(
                 True,
                 {
-                    "manim_code": manim_code,
-                    "audio_script": audio_script,
+                    "manim_code": clean_manim_code(self._strip_fence(sections.code)),
+                    "narration": asyncio.create_task(self._narrate(chunks, sections, started, handoff)),
                 }
             )
 
         except Exception as e:
-            return AgentResult(False, error=str(e))
\ No newline at end of file
+            return AgentResult(False, error=str(e))
+
+    async def _narrate(self, chunks, sections: SectionStream, started: float, handoff: float) -> str:
+        async for chunk in chunks:
+            sections.feed(chunk)
+        self._record(handoff, time.perf_counter() - started, early=True)
+
+        script = sections.narration()
+        if not script:
+            raise ValueError("Gemini output missing required section (===AUDIO_SCRIPT===)")
+        return script
+
+    def _record(self, handoff: float, total: float, early: bool):
+        with self._lock:
+            self._stream_stats["streams"] += 1
+            self._stream_stats["early_handoffs"] += int(early)
+            self._stream_stats["handoff_seconds"] += handoff
+            self._stream_stats["stream_seconds"] += total
+
+    def stream_stats(self) -> dict:
+        # The gap between handoff and stream end is generation time the code stages no longer wait for
+        with self._lock:
+            stats = dict(self._stream_stats)
+
+        streams = stats["streams"] or 1
+        return {
+            "streams": stats["streams"],
+            "early_handoffs": stats["early_handoffs"],
+            "avg_handoff_seconds": stats["handoff_seconds"] / streams,
+            "avg_stream_seconds": stats["stream_seconds"] / streams,
+            "avg_overlap_seconds": (stats["stream_seconds"] - stats["handoff_seconds"]) / streams,
+        }
+
+    def _strip_fence(self, raw_code: str) -> str:
+        if raw_code.startswith("```"):
+            lines = raw_code.split('\n')
+            if lines[0].strip().startswith("```"):
+                lines = lines[1:]
+            if lines and lines[-1].strip() == "```":
+                lines = lines[:-1]
+            raw_code = "\n".join(lines).strip()
+        return raw_code
+
+    def _parse(self, text: str) -> AgentResult:
+        manim_pattern = r"===MANIM_CODE===\s*(.*?)===AUDIO_SCRIPT==="
+        manim_match = re.search(manim_pattern, text, re.DOTALL)
+
+        audio_pattern = r"===AUDIO_SCRIPT===\s*(.*)"
+        audio_match = re.search(audio_pattern, text, re.DOTALL)
+
+        if not manim_match or not audio_match:
+            fallback_manim = re.search(r"MANIM_CODE:\s*```python(.*?)```", text, re.DOTALL | re.IGNORECASE)
+            fallback_audio = re.search(r"AUDIO_SCRIPT:\s*(.*)", text, re.DOTALL | re.IGNORECASE)
+            
+            if fallback_manim and fallback_audio:
+                 manim_match = fallback_manim
+                 audio_match = fallback_audio
+            else:
+                return AgentResult(
+                    False,
+                    error="Gemini output missing required sections (===MANIM_CODE=== or ===AUDIO_SCRIPT===)"
+                )
+
+        raw_code = manim_match.group(1).strip()
+        audio_script = audio_match.group(1).strip()
+        manim_code = clean_manim_code(self._strip_fence(raw_code))
+
+        return AgentResult(
+            True,
+            {
+                "manim_code": manim_code,
+                "audio_script": audio_script,
+            }
+        )
\ No newline at end of file
@@ -1,6 +1,15 @@
+import asyncio
 import os
+import time
 import uuid
+from graph.checkpoints import save_checkpoint
 from graph.pipeline_state import PipelineState
+from graph.pipeline_stats import record_failure
+from jobs.rate_limits import tts_limiter
+from utils.error_details import build_error_details
+
+# How long a finished render waits for its narration before it ships silent
+NARRATION_TIMEOUT = float(os.getenv("NARRATION_TIMEOUT", "120"))
 
 # ---------------- INIT AGENTS ----------------
 
@@ -12,12 +21,13 @@ def init_agents(gemini_model, eleven_client, audio_dir):
     from agents.audio_agent import AudioAgent
     from agents.fix_agent import FixAgent
     from agents.media_sync_agent import MediaSyncAgent
+    from render.worker_pool import RenderWorkerPool
 
     return {
         "gemini": GeminiManimAgent(gemini_model),
         "align": AlignmentAgent(gemini_model),
         "test": TestAgent(),
-        "render": RenderAgent(),
+        "render": RenderAgent(RenderWorkerPool()),
         "audio": AudioAgent(eleven_client, audio_dir),
         "fix": FixAgent(gemini_model),
         "media_sync": MediaSyncAgent(),
@@ -25,8 +35,22 @@ def init_agents(gemini_model, eleven_client, audio_dir):
 
 # ---------------- GRAPH NODES ----------------
 
-def gemini_node(state: PipelineState, agents):
-    result = agents["gemini"].run(state["prompt"])
+def stage_failure(stage: str, state: PipelineState, error: str) -> dict:
+    # Keep the real output for fix_node instead of a generic failure message
+    details = build_error_details(stage, error, state.get("script_path"), state.get("manim_code"))
+    record_failure(details)
+
+    summary = f"{details['exception_type']}: {details['message']}" if details["message"] else details["exception_type"]
+    return {
+        "error": f"{stage} failed: {summary}",
+        "error_details": details
+    }
+
+# The LLM stages are coroutines so a job waiting on Gemini does not hold a thread
+
+async def gemini_node(state: PipelineState, agents):
+    # Returns once the code section closes; the narration keeps streaming and goes straight to TTS
+    result = await agents["gemini"].astream(state["prompt"])
 
     if not result.success:
         return {
@@ -34,15 +58,34 @@ def gemini_node(state: PipelineState, agents):
             "manim_code": None
         }
 
+    narration = asyncio.ensure_future(finish_narration(state, result.data["narration"]))
     return {
         "manim_code": result.data["manim_code"],
-        "audio_script": result.data["audio_script"],
+        "audio_task": agents["audio"].start_when_ready(narration),
         "error": None
     }
 
+async def finish_narration(state: PipelineState, narration) -> str:
+    script = await narration
+
+    # Saved on its own, so a resumed job can re-synthesise narration that arrived after the handoff
+    if state.get("job_id"):
+        await asyncio.to_thread(save_checkpoint, state["job_id"], "gemini", {"audio_script": script})
+
+    error = tts_budget_error(state, script)
+    if error:
+        raise RuntimeError(error)
+    return script
+
+def tts_budget_error(state: PipelineState, script: str):
+    # A user past their TTS budget still gets the video, just without narration
+    if state.get("user_id") is not None and tts_limiter.take(state["user_id"], len(script)):
+        return "TTS character budget exceeded"
+    return None
 
-def fix_node(state, agents):
-    result = agents["fix"].run(state)
+
+async def fix_node(state, agents):
+    result = await agents["fix"].arun(state)
 
     if not result.success:
         return {
@@ -53,16 +96,17 @@ def fix_node(state, agents):
     return {
         "manim_code": result.data,
         "retries": state.get("retries", 0) + 1,
-        "error": None
+        "error": None,
+        "error_details": None
     }
 
 
-def alignment_node(state: PipelineState, agents):
+async def alignment_node(state: PipelineState, agents):
     # If error exists, return empty dict (no updates)
     if state.get("error"):
         return {}
 
-    result = agents["align"].run(state["manim_code"])
+    result = await agents["align"].arun(state["manim_code"])
     
     # Only update manim_code if successful
     if result.success:
@@ -108,14 +152,18 @@ def test_node(state, agents):
             "test_passed": True
         }
 
-    # If retries maxed out
-    if state.get("retries", 0) >= 2:
-        return {
-            "error": "Max retries reached during test",
-            "test_passed": False
-        }
+    return {**stage_failure("compile", state, result.error), "test_passed": False}
 
-    return {"error": "Test failed, requesting fix"}
+def dry_run_node(state: PipelineState, agents):
+    if state.get("error"):
+        return {}
+
+    # Execute construct() without encoding so runtime errors reach fix_node cheaply
+    result = agents["render"].dry_run(state["script_path"])
+    if not result.success:
+        return stage_failure("dry_run", state, result.error)
+
+    return {}
 
 def render_node(state: PipelineState, agents):
     # Parallel Node: MUST only return its specific updates
@@ -127,42 +175,74 @@ def render_node(state: PipelineState, agents):
         state["videos_dir"]
     )
     if not result.success:
-        return {"error": result.error}
+        return stage_failure("render", state, result.error)
 
     return {"video_path": result.data}
 
 
 def audio_node(state: PipelineState, agents):
     # Parallel Node: MUST only return its specific updates
-    if state.get("error"):
+    script = state.get("audio_script")
+
+    # Streamed narration is already queued for synthesis by gemini_node
+    if agents["audio"].has_task(state.get("audio_task")):
+        return {}
+
+    # A resumed job still carries the error it is being resumed from; only a failed generation skips narration
+    if state.get("error") and not script:
         return {}
 
-    script = state.get("audio_script")
     if not script:
-        return {"error": "No audio script found"}
+        return {"audio_error": "No audio script found"}
 
-    result = agents["audio"].run(script)
-    if result.success:
-        return {"audio_path": result.data}
-    
-    return {"error": result.error}
+    error = tts_budget_error(state, script)
+    if error:
+        return {"audio_error": error}
+
+    return {"audio_task": agents["audio"].start(script)}
 
 def media_sync_node(state: PipelineState, agents):
     if state.get("error"):
         return {}
 
-    if not state.get("video_path") or not state.get("audio_path"):
-        return {"error": "Missing audio or video for merging"}
+    if not state.get("video_path"):
+        return {"error": "Missing video for merging"}
+
+    # Audio problems never fail the job; the silent render is kept instead
+    if not state.get("audio_task"):
+        return {}
+
+    # Streamed narration only reaches the state here, in time for the cache writeback;
+    # script() waits on the same synthesis that result() would, both within one deadline
+    deadline = time.monotonic() + NARRATION_TIMEOUT
+    script = agents["audio"].script(state["audio_task"], NARRATION_TIMEOUT)
+    narration = {"audio_script": script} if script and not state.get("audio_script") else {}
+
+    audio = agents["audio"].result(state["audio_task"], max(0.0, deadline - time.monotonic()))
+    if not audio.success:
+        return {**narration, "audio_error": audio.error}
 
     result = agents["media_sync"].run(
         state["video_path"],
-        state["audio_path"],
+        audio.data,
         state["videos_dir"]
     )
 
     if not result["success"]:
-        return {"error": result["error"]}
+        return {
+            **narration,
+            "audio_path": audio.data,
+            "audio_error": result["error"]
+        }
+
+    # Only the merged file is referenced from here on; the render cache keeps its own link
+    try:
+        os.remove(state["video_path"])
+    except OSError:
+        pass
 
     return {
+        **narration,
+        "audio_path": audio.data,
         "final_video_path": result["data"]
     }
\ No newline at end of file
@@ -0,0 +1,53 @@
+import asyncio
+from jobs.limits import llm_limiter
+from storage.llm_memo import memo_key, get_memo, save_memo
+from utils.prompts import PROMPT_VERSIONS
+
+def generate_text(model, stage: str, prompt: str) -> str:
+    # Identical (stage, template version, prompt) inputs are answered from the memo
+    key = memo_key(stage, PROMPT_VERSIONS[stage], prompt)
+
+    cached = get_memo(stage, key)
+    if cached is not None:
+        return cached
+
+    with llm_limiter.slot():
+        text = model.generate_content(prompt).text
+    if text:
+        save_memo(key, text)
+    return text
+
+async def agenerate_text(model, stage: str, prompt: str) -> str:
+    # Same memo and limits as generate_text, but the network wait does not hold a thread
+    key = memo_key(stage, PROMPT_VERSIONS[stage], prompt)
+
+    cached = await asyncio.to_thread(get_memo, stage, key)
+    if cached is not None:
+        return cached
+
+    async with llm_limiter.aslot():
+        response = await model.generate_content_async(prompt)
+    text = response.text
+    if text:
+        await asyncio.to_thread(save_memo, key, text)
+    return text
+
+async def astream_text(model, stage: str, prompt: str):
+    # Yields the response as it is generated; a memoized response arrives as one chunk
+    key = memo_key(stage, PROMPT_VERSIONS[stage], prompt)
+
+    cached = await asyncio.to_thread(get_memo, stage, key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    async with llm_limiter.aslot():
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            parts.append(chunk.text)
+            yield chunk.text
+
+    text = "".join(parts)
+    if text:
+        await asyncio.to_thread(save_memo, key, text)
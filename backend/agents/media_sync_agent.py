@@ -14,6 +14,9 @@ class MediaSyncAgent:
                 "-i", video_path,
                 "-i", audio_path,
                 "-c:v", "copy",
+                # Narration shorter than the animation is padded with silence, so -shortest
+                # always stops at the end of the video rather than cutting it off
+                "-af", "apad",
                 "-c:a", "aac",
                 "-shortest",
                 output_path
@@ -1,25 +1,90 @@
-import subprocess, glob, os
+import os, shutil
 from agents.base import BaseAgent, AgentResult
+from render.worker_pool import RenderWorkerPool
+from render.scheduler import PRIORITY_PREVIEW, PRIORITY_UPGRADE
+from render.cache import render_key, get_render, has_render, save_render
+
+RENDER_QUALITY = "low_quality"
+UPGRADE_QUALITY = os.getenv("UPGRADE_QUALITY", "medium_quality")
+RENDER_JOBS_DIR = os.path.join("media", "jobs")
+DRY_RUN_TIMEOUT = int(os.getenv("DRY_RUN_TIMEOUT", "60"))
 
 class RenderAgent(BaseAgent):
     name = "RenderAgent"
 
-    def run(self, script_path: str, videos_dir: str) -> AgentResult:
-        proc = subprocess.run(
-            ["manim", "-pql", script_path, "GeneratedScene"],
-            capture_output=True,
-            text=True
-        )
+    # The pool owns a set of Manim processes, so callers share one instead of each spawning their own
+    def __init__(self, pool: RenderWorkerPool):
+        self.pool = pool
+
+    def _cache_key(self, script_path: str, quality: str = RENDER_QUALITY) -> str:
+        with open(script_path, "r", encoding="utf-8") as f:
+            return render_key(f.read(), quality)
 
-        if proc.returncode != 0:
-            return AgentResult(False, error=proc.stderr)
+    def dry_run(self, script_path: str) -> AgentResult:
+        # A script with a cached render has already executed end to end
+        if has_render(self._cache_key(script_path)):
+            return AgentResult(True)
 
         name = os.path.splitext(os.path.basename(script_path))[0]
-        matches = glob.glob(f"media/videos/{name}/**/GeneratedScene.mp4", recursive=True)
+        job_dir = os.path.abspath(os.path.join(RENDER_JOBS_DIR, f"{name}_dry"))
+
+        try:
+            result = self.pool.run({
+                "script_path": script_path,
+                "quality": RENDER_QUALITY,
+                "output_dir": job_dir,
+                "output_file": name,
+                "dry_run": True
+            }, timeout=DRY_RUN_TIMEOUT)
+
+            if not result["success"]:
+                return AgentResult(False, error=result["error"])
 
-        if not matches:
-            return AgentResult(False, error="Video not found")
+            self.log(f"dry run {result['timings']['dry_run_seconds']:.2f}s")
+            return AgentResult(True)
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
 
+    def upgrade(self, script_path: str, videos_dir: str) -> AgentResult:
+        # Background re-render at a higher preset; always yields the pool to preview renders
+        return self.run(script_path, videos_dir, quality=UPGRADE_QUALITY, priority=PRIORITY_UPGRADE)
+
+    def run(self, script_path: str, videos_dir: str,
+            quality: str = RENDER_QUALITY, priority: int = PRIORITY_PREVIEW) -> AgentResult:
+        name = os.path.splitext(os.path.basename(script_path))[0]
+        job_dir = os.path.abspath(os.path.join(RENDER_JOBS_DIR, name))
+        rendered_path = os.path.join(job_dir, f"{name}.mp4")
         final_path = os.path.join(videos_dir, f"{name}.mp4")
-        os.rename(matches[0], final_path)
-        return AgentResult(True, final_path)
+
+        cache_key = self._cache_key(script_path, quality)
+        if get_render(cache_key, final_path):
+            self.log("render cache hit")
+            return AgentResult(True, final_path)
+
+        try:
+            result = self.pool.run({
+                "script_path": script_path,
+                "quality": quality,
+                "output_dir": job_dir,
+                "output_file": name
+            }, priority=priority)
+
+            if not result["success"]:
+                return AgentResult(False, error=result["error"])
+
+            timings = result["timings"]
+            self.log(f"setup {timings['setup_seconds']:.2f}s, render {timings['render_seconds']:.2f}s")
+
+            if not os.path.exists(rendered_path):
+                return AgentResult(False, error="Video not found")
+
+            os.replace(rendered_path, final_path)
+
+            try:
+                save_render(cache_key, final_path)
+            except OSError as e:
+                self.log(f"could not cache render: {e}")
+
+            return AgentResult(True, final_path)
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
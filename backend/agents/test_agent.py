@@ -1,17 +1,19 @@
-import subprocess
 from agents.base import BaseAgent, AgentResult
+from utils.manim_validator import validate_manim_code, format_issues
 
 class TestAgent(BaseAgent):
     name = "TestAgent"
 
     def run(self, script_path: str) -> AgentResult:
-        proc = subprocess.run(
-            ["python", "-m", "py_compile", script_path],
-            capture_output=True,
-            text=True
-        )
+        # Static checks in-process: catches forbidden Manim usage before any render time is spent
+        try:
+            with open(script_path, "r", encoding="utf-8") as f:
+                code = f.read()
+        except OSError as e:
+            return AgentResult(False, error=f"Could not read script: {e}")
 
-        if proc.returncode == 0:
+        issues = validate_manim_code(code)
+        if not issues:
             return AgentResult(True)
 
-        return AgentResult(False, error=proc.stderr)
+        return AgentResult(False, error=format_issues(issues, code))
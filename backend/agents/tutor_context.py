@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from storage.chat_log import read_history, read_summary, save_summary
+from utils.prompts import build_chat_summary_prompt
+
+CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "6"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "4000"))
+CHAT_STATS_MAX_SESSIONS = int(os.getenv("CHAT_STATS_MAX_SESSIONS", "1000"))
+
+logger = logging.getLogger("TutorContext")
+
+# Per-session stats for the most recently active sessions; the least recently active is dropped first
+session_stats = OrderedDict()
+
+def estimate_tokens(text: str) -> int:
+    # Rough 4-characters-per-token estimate; avoids a count_tokens round trip per turn
+    return len(text) // 4 + 1
+
+
+class TutorContext:
+    # Keeps the last CHAT_RECENT_TURNS turns verbatim and folds older ones into a stored summary
+    def __init__(self, session_id: str, summarizer, summary: str, recent: list, last_seq: int):
+        self.session_id = session_id
+        self.summarizer = summarizer
+        self.summary = summary
+        self.recent = recent
+        self.last_seq = last_seq
+        self._compaction = None
+
+    @classmethod
+    async def load(cls, session_id: str, summarizer):
+        stored = await asyncio.to_thread(read_summary, session_id)
+        summarized_upto = stored["upto_seq"]
+
+        # Everything the summary does not cover yet; compaction below folds it if it is long
+        recent = await asyncio.to_thread(read_history, session_id, None, None, summarized_upto)
+        last_seq = max(recent[-1]["seq"] if recent else 0, summarized_upto)
+
+        context = cls(session_id, summarizer, stored["summary"], recent, last_seq)
+        context.schedule_compaction()
+        return context
+
+    def system_instruction(self, base: str) -> str:
+        if not self.summary:
+            return base
+        return f"{base}\n\nSummary of the earlier conversation with this student:\n{self.summary}"
+
+    def _window(self, reserved_tokens: int) -> list:
+        budget = CHAT_CONTEXT_TOKENS - estimate_tokens(self.summary) - reserved_tokens
+        window = []
+
+        for msg in reversed(self.recent):
+            budget -= estimate_tokens(msg["content"])
+            if budget < 0:
+                break
+            window.append(msg)
+
+        # Gemini expects the conversation to open with a user turn
+        while window and window[-1]["role"] != "user":
+            window.pop()
+
+        return list(reversed(window))
+
+    def build_contents(self, user_input: str) -> list:
+        contents = [
+            {"role": msg["role"], "parts": [msg["content"]]}
+            for msg in self._window(estimate_tokens(user_input))
+        ]
+        contents.append({"role": "user", "parts": [user_input]})
+        return contents
+
+    def record_turn(self, user_input: str, reply: str, prompt_tokens: int, ttft: float):
+        self.recent.append({"seq": self.last_seq + 1, "role": "user", "content": user_input})
+        self.recent.append({"seq": self.last_seq + 2, "role": "model", "content": reply})
+        self.last_seq += 2
+
+        stats = session_stats.setdefault(self.session_id, {
+            "turns": 0,
+            "total_prompt_tokens": 0,
+            "total_ttft_ms": 0.0,
+        })
+        session_stats.move_to_end(self.session_id)
+        while len(session_stats) > CHAT_STATS_MAX_SESSIONS:
+            session_stats.popitem(last=False)
+        stats["turns"] += 1
+        stats["total_prompt_tokens"] += prompt_tokens
+        stats["total_ttft_ms"] += ttft * 1000
+        stats["last_prompt_tokens"] = prompt_tokens
+        stats["last_ttft_ms"] = ttft * 1000
+        stats["avg_prompt_tokens"] = stats["total_prompt_tokens"] / stats["turns"]
+        stats["avg_ttft_ms"] = stats["total_ttft_ms"] / stats["turns"]
+        stats["summary_tokens"] = estimate_tokens(self.summary) if self.summary else 0
+        stats["verbatim_messages"] = len(self.recent)
+
+        logger.info(
+            f"Session {self.session_id}: prompt ~{prompt_tokens} tokens, TTFT {ttft * 1000:.0f}ms"
+        )
+
+    def _to_fold(self) -> list:
+        keep = self.recent[-CHAT_RECENT_TURNS * 2:]
+        budget = CHAT_CONTEXT_TOKENS * 3 // 4
+
+        # Beyond the turn limit, also fold old verbatim turns that no longer fit the budget
+        while len(keep) > 2 and sum(estimate_tokens(m["content"]) for m in keep) > budget:
+            keep = keep[2:]
+
+        return self.recent[:len(self.recent) - len(keep)]
+
+    def schedule_compaction(self):
+        if self._compaction and not self._compaction.done():
+            return
+
+        # Summarize in chunks: wait until twice the verbatim window has built up (or the budget is hit)
+        recent_tokens = sum(estimate_tokens(m["content"]) for m in self.recent)
+        if len(self.recent) < CHAT_RECENT_TURNS * 4 and recent_tokens <= CHAT_CONTEXT_TOKENS * 3 // 4:
+            return
+
+        if self._to_fold():
+            self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self):
+        folded = self._to_fold()
+
+        try:
+            prompt = build_chat_summary_prompt(self.summary, folded)
+            response = await self.summarizer.generate_content_async(prompt)
+            summary = (response.text or "").strip()
+        except Exception as e:
+            logger.error(f"Summarizing session {self.session_id} failed: {e}")
+            return
+
+        if not summary:
+            return
+
+        summarized_upto = folded[-1]["seq"]
+        self.summary = summary
+        self.recent = [msg for msg in self.recent if msg["seq"] > summarized_upto]
+
+        await asyncio.to_thread(save_summary, self.session_id, summary, summarized_upto)
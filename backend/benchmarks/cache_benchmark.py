@@ -0,0 +1,78 @@
+# Compares the SQLite cache backend against the old one-JSON-file-per-key layout.
+# Run from backend/:  python -m benchmarks.cache_benchmark [entries]
+import json
+import os
+import sys
+import tempfile
+import time
+
+ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+workdir = tempfile.mkdtemp(prefix="cache_bench_")
+os.environ["CACHE_DIR"] = os.path.join(workdir, "sqlite")
+
+from storage import cache  # noqa: E402 - must see CACHE_DIR first
+
+
+class FilePerKeyCache:
+    # The previous storage/cache.py implementation
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, key: str, data):
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+def payload(i: int) -> dict:
+    return {
+        "prompt": f"topic number {i}",
+        "manim_code": "from manim import *\n" + "self.play(Create(Circle()))\n" * 40,
+        "audio_script": "narration " * 200,
+        "video_path": f"videos/{i:064x}.mp4",
+        "audio_path": None,
+    }
+
+
+def timed(fn, keys) -> float:
+    started = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - started) / len(keys) * 1e6
+
+
+def main():
+    keys = [f"result_{i}" for i in range(ENTRIES)]
+    data = {key: payload(i) for i, key in enumerate(keys)}
+    files = FilePerKeyCache(os.path.join(workdir, "files"))
+
+    results = {
+        "file write": timed(lambda k: files.save(k, data[k]), keys),
+        "sqlite write": timed(lambda k: cache.save_cached_result(k, data[k]), keys),
+        "file read": timed(files.get, keys),
+        "sqlite read": timed(cache.get_cached_result, keys),
+    }
+
+    started = time.perf_counter()
+    for i in range(0, ENTRIES, 50):
+        cache.get_many(keys[i:i + 50])
+    results["sqlite get_many (per key)"] = (time.perf_counter() - started) / ENTRIES * 1e6
+
+    print(f"{ENTRIES} entries, mean latency per key")
+    for name, micros in results.items():
+        print(f"  {name:<28} {micros:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Compares thread-per-call LLM concurrency against the async agents, using a local stub model
+# that sleeps for a fixed latency instead of calling Gemini.
+# Run from backend/:  python -m benchmarks.llm_concurrency_benchmark [calls] [latency_seconds]
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+workdir = tempfile.mkdtemp(prefix="llm_bench_")
+os.environ["CACHE_DIR"] = workdir
+# The stage limit would otherwise cap both modes at the same concurrency
+os.environ["LLM_CONCURRENCY"] = str(CALLS)
+
+from agents.gemini_manim_agent import GeminiManimAgent  # noqa: E402 - must see the env first
+
+RESPONSE = """===MANIM_CODE===
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+===AUDIO_SCRIPT===
+A circle is drawn.
+"""
+
+
+class StubResponse:
+    text = RESPONSE
+
+
+class StubModel:
+    # Same interface as genai.GenerativeModel for the calls the agents make
+    def generate_content(self, prompt):
+        time.sleep(LATENCY)
+        return StubResponse()
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(LATENCY)
+        return StubResponse()
+
+
+class ThreadSampler:
+    # Records the highest thread count seen while a run is in progress
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def measure(name: str, run) -> dict:
+    tracemalloc.start()
+    with ThreadSampler() as sampler:
+        started = time.perf_counter()
+        results = run()
+        wall = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": name,
+        "ok": sum(1 for result in results if result.success),
+        "wall": wall,
+        "threads": sampler.peak,
+        "memory_mb": peak_bytes / (1024 * 1024),
+    }
+
+
+def main():
+    agent = GeminiManimAgent(StubModel())
+    # Distinct topics per mode, so neither run is answered from the LLM memo
+    thread_topics = [f"thread topic {i}" for i in range(CALLS)]
+    async_topics = [f"async topic {i}" for i in range(CALLS)]
+
+    def threaded():
+        with ThreadPoolExecutor(max_workers=CALLS) as pool:
+            return list(pool.map(agent.run, thread_topics))
+
+    def concurrent():
+        async def gather():
+            return await asyncio.gather(*(agent.arun(topic) for topic in async_topics))
+        return asyncio.run(gather())
+
+    rows = [measure("thread pool", threaded), measure("asyncio", concurrent)]
+
+    print(f"{CALLS} concurrent calls, {LATENCY:.2f}s stub latency")
+    for row in rows:
+        print(
+            f"  {row['mode']:<12} {row['ok']:>5} ok  {row['wall']:7.2f}s wall  "
+            f"{row['threads']:>5} peak threads  {row['memory_mb']:7.1f} MB peak allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import threading
+import time
+from storage.cache import get_cached_result, save_cached_result, delete_cached_result
+from graph.pipeline_state import merge_timings
+
+# Stages that only need the generated script, not a fresh generation, to be retried
+SCRIPT_STAGES = ("compile", "dry_run", "render")
+
+_lock = threading.Lock()
+
+def _key(job_id: str) -> str:
+    return f"checkpoint_{job_id}"
+
+def open_checkpoint(job_id: str, user_id: int, state: dict):
+    save_cached_result(_key(job_id), {
+        "user_id": user_id,
+        "state": state,
+        "stage": None,
+        "stages": [],
+        "updated_at": time.time(),
+    })
+
+def save_checkpoint(job_id: str, stage: str, update: dict):
+    # Parallel branches finish in the same superstep, so updates are merged rather than overwritten
+    with _lock:
+        checkpoint = get_cached_result(_key(job_id))
+        if not checkpoint:
+            return
+
+        state = checkpoint["state"]
+        for name, value in update.items():
+            state[name] = merge_timings(state.get(name), value) if name == "timings" else value
+
+        checkpoint["stage"] = stage
+        checkpoint["stages"].append(stage)
+        checkpoint["updated_at"] = time.time()
+        save_cached_result(_key(job_id), checkpoint)
+
+def load_checkpoint(job_id: str):
+    return get_cached_result(_key(job_id))
+
+def delete_checkpoint(job_id: str):
+    delete_cached_result(_key(job_id))
+
+def resume_stage(state: dict) -> str:
+    # Without a script there is nothing to salvage; start over (the result cache still applies)
+    if not state.get("manim_code"):
+        return "cache"
+
+    details = state.get("error_details") or {}
+    if state.get("error") and details.get("stage") in SCRIPT_STAGES:
+        return "fix"
+
+    # Interrupted mid-run: re-save and re-check the script we already have
+    return "save_script"
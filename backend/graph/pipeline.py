@@ -1,112 +1,163 @@
-# from langgraph.graph import StateGraph, END
-# from graph.pipeline_state import PipelineState
-# from agents.langgraph_nodes import fix_node, media_sync_node
-# from agents.langgraph_nodes import (
-#     gemini_node,
-#     alignment_node,
-#     save_script_node,
-#     test_node,
-#     render_node,
-#     audio_node,
-# )
-
-# def route_after_test(state):
-#     if state.get("test_passed"):
-#         return ["render", "audio"]
-
-#     if (state.get("error") and 
-#         state.get("manim_code") and 
-#         state.get("retries", 0) < 2):
-#         return "fix"
-
-#     return "end"
-
-# def build_pipeline(agents):
-#     graph = StateGraph(PipelineState)
-
-#     graph.add_node("gemini", lambda s: gemini_node(s, agents))
-#     graph.add_node("align", lambda s: alignment_node(s, agents))
-#     graph.add_node("save_script", lambda s: save_script_node(s, agents))
-#     graph.add_node("test", lambda s: test_node(s, agents))
-#     graph.add_node("render", lambda s: render_node(s, agents))
-#     graph.add_node("audio", lambda s: audio_node(s, agents))
-#     graph.add_node("fix", lambda s: fix_node(s, agents))
-#     graph.add_node("media_sync", lambda s: media_sync_node(s, agents))
-
-#     graph.set_entry_point("gemini")
-
-#     graph.add_edge("gemini", "align")
-#     graph.add_edge("align", "save_script")
-#     graph.add_edge("save_script", "test")
-
-#     graph.add_conditional_edges(
-#         "test",
-#         route_after_test,
-#         {
-#             "render": "render",
-#             "audio": "audio",
-#             "fix": "fix",
-#             "end": END,
-#         }
-#     )
-
-#     graph.add_edge("fix", "save_script")
-
-#     # Parallel Convergence
-#     # Both render and audio must finish; StateGraph handles the merge,
-#     # then proceeds to media_sync in the next step.
-#     graph.add_edge("render", "media_sync")
-#     graph.add_edge("audio", "media_sync")
-    
-#     graph.add_edge("media_sync", END)
-
-#     return graph.compile()
-
+import asyncio
+import inspect
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from langgraph.graph import StateGraph, END
 from graph.pipeline_state import PipelineState
+from graph.checkpoints import save_checkpoint
+from jobs.queue import JOB_WORKERS
 from agents.langgraph_nodes import fix_node, media_sync_node
+from agents.cache_agent import cache_agent, cache_writeback_agent
 from agents.langgraph_nodes import (
     gemini_node,
     alignment_node,
     save_script_node,
     test_node,
+    dry_run_node,
     render_node,
     audio_node,
 )
 
+MAX_RETRIES = 2
+
+RENDER_STAGE_WORKERS = int(os.getenv("RENDER_STAGE_WORKERS", str(JOB_WORKERS)))
+MEDIA_STAGE_WORKERS = int(os.getenv("MEDIA_STAGE_WORKERS", "4"))
+
+# These stages block for minutes on the render scheduler, TTS or ffmpeg. Their own threads keep
+# the loop's default executor free for the short SQLite calls that jobs in LLM stages make, and
+# a finished render never queues its merge behind renders still waiting for a slot
+_render_stages = ThreadPoolExecutor(max_workers=max(1, RENDER_STAGE_WORKERS), thread_name_prefix="render-stage")
+_media_stages = ThreadPoolExecutor(max_workers=max(1, MEDIA_STAGE_WORKERS), thread_name_prefix="media-stage")
+
+STAGE_EXECUTORS = {
+    "dry_run": _render_stages,
+    "render": _render_stages,
+    "media_sync": _media_stages,
+}
+
+def offloaded(executor, node):
+    async def run(state):
+        return await asyncio.get_running_loop().run_in_executor(executor, node, state)
+    return run
+
+def tracked(stage, node):
+    # Times every node and persists its update so a failed job can resume from here
+    if stage in STAGE_EXECUTORS:
+        node = offloaded(STAGE_EXECUTORS[stage], node)
+
+    if inspect.iscoroutinefunction(node):
+        async def arun(state):
+            started = time.perf_counter()
+            update = {**await node(state), "timings": {stage: time.perf_counter() - started}}
+            if state.get("job_id"):
+                await asyncio.to_thread(save_checkpoint, state["job_id"], stage, update)
+            return update
+        return arun
+
+    def run(state):
+        started = time.perf_counter()
+        update = {**node(state), "timings": {stage: time.perf_counter() - started}}
+        if state.get("job_id"):
+            save_checkpoint(state["job_id"], stage, update)
+        return update
+    return run
+
+def route_after_cache(state):
+    if state.get("cache_hit"):
+        return "end"
+
+    return "gemini"
+
 def route_after_test(state):
     if state.get("test_passed"):
-        return "render"  
+        return "dry_run"
 
     if (state.get("error") and 
         state.get("manim_code") and 
-        state.get("retries", 0) < 2):
+        state.get("retries", 0) < MAX_RETRIES):
         return "fix"
 
     return "end"
 
+def route_after_script_stage(next_stage):
+    def route(state):
+        if not state.get("error"):
+            return next_stage
+
+        if state.get("manim_code") and state.get("retries", 0) < MAX_RETRIES:
+            return "fix"
+
+        return "end"
+    return route
+
 def build_pipeline(agents):
     graph = StateGraph(PipelineState)
 
-    graph.add_node("gemini", lambda s: gemini_node(s, agents))
-    graph.add_node("align", lambda s: alignment_node(s, agents))
-    graph.add_node("save_script", lambda s: save_script_node(s, agents))
-    graph.add_node("test", lambda s: test_node(s, agents))
-    graph.add_node("render", lambda s: render_node(s, agents))
-    graph.add_node("fix", lambda s: fix_node(s, agents))
+    graph.add_node("cache", tracked("cache", cache_agent))
+    graph.add_node("gemini", tracked("gemini", partial(gemini_node, agents=agents)))
+    graph.add_node("align", tracked("align", partial(alignment_node, agents=agents)))
+    graph.add_node("save_script", tracked("save_script", partial(save_script_node, agents=agents)))
+    graph.add_node("test", tracked("test", partial(test_node, agents=agents)))
+    graph.add_node("dry_run", tracked("dry_run", partial(dry_run_node, agents=agents)))
+    graph.add_node("render", tracked("render", partial(render_node, agents=agents)))
+    graph.add_node("fix", tracked("fix", partial(fix_node, agents=agents)))
     
-    graph.add_node("audio", lambda s: audio_node(s, agents))
-    graph.add_node("media_sync", lambda s: media_sync_node(s, agents))
+    graph.add_node("audio", tracked("audio", partial(audio_node, agents=agents)))
+    graph.add_node("media_sync", tracked("media_sync", partial(media_sync_node, agents=agents)))
+    graph.add_node("cache_writeback", tracked("cache_writeback", cache_writeback_agent))
+
+    def route_entry(state):
+        stage = state.get("resume_stage")
+        if not stage or stage == "cache":
+            return "cache"
+
+        # A resumed run reuses the narration unless its background task is gone
+        if agents["audio"].has_task(state.get("audio_task")):
+            return stage
+        return [stage, "audio"]
+
+    graph.set_conditional_entry_point(
+        route_entry,
+        {
+            "cache": "cache",
+            "save_script": "save_script",
+            "fix": "fix",
+            "audio": "audio",
+        }
+    )
 
-    graph.set_entry_point("gemini")
+    graph.add_conditional_edges(
+        "cache",
+        route_after_cache,
+        {
+            "gemini": "gemini",
+            "end": END,
+        }
+    )
 
+    # Fan-out: narration is synthesised in the background while the code is aligned, tested and rendered
     graph.add_edge("gemini", "align")
+    graph.add_edge("gemini", "audio")
+    graph.add_edge("audio", END)
     graph.add_edge("align", "save_script")
     graph.add_edge("save_script", "test")
 
     graph.add_conditional_edges(
         "test",
         route_after_test,
+        {
+            "dry_run": "dry_run",
+            "fix": "fix",
+            "end": END,
+        }
+    )
+
+    # Full encoding only starts once the scene has executed end to end
+    graph.add_conditional_edges(
+        "dry_run",
+        route_after_script_stage("render"),
         {
             "render": "render",
             "fix": "fix",
@@ -114,8 +165,19 @@ def build_pipeline(agents):
         }
     )
 
-    graph.add_edge("fix", "save_script")
+    # audio_task is set long before render finishes, so media_sync only waits on the render
+    graph.add_conditional_edges(
+        "render",
+        route_after_script_stage("media_sync"),
+        {
+            "media_sync": "media_sync",
+            "fix": "fix",
+            "end": END,
+        }
+    )
 
-    graph.add_edge("render", END)  
+    graph.add_edge("fix", "save_script")
+    graph.add_edge("media_sync", "cache_writeback")
+    graph.add_edge("cache_writeback", END)
 
     return graph.compile()
@@ -1,7 +1,21 @@
-from typing import TypedDict, Optional
+from typing import TypedDict, Optional, Annotated
+
+def merge_timings(left: Optional[dict], right: Optional[dict]) -> dict:
+    # Parallel branches and the fix loop both report stage times; sum them per stage
+    merged = dict(left or {})
+    for stage, seconds in (right or {}).items():
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    return merged
 
 class PipelineState(TypedDict):
+    job_id: Optional[str]
+    user_id: Optional[int]
+    resume_stage: Optional[str]
+
     prompt: str
+    cache_key: Optional[str]
+    cache_hit: Optional[bool]
+    allow_similar: Optional[bool]
 
     manim_code: Optional[str]
     transcript: Optional[str]
@@ -10,11 +24,18 @@ class PipelineState(TypedDict):
     video_path: Optional[str]
     video_duration: Optional[float]
     audio_script: Optional[str]
+    audio_task: Optional[str]
     audio_path: Optional[str]
+    audio_error: Optional[str]
     final_video_path: Optional[str]
+    video_tier: Optional[str]
 
     error: Optional[str]
+    error_details: Optional[dict]
     retries: int
+    test_passed: Optional[bool]
 
     scripts_dir: str
     videos_dir: str
+
+    timings: Annotated[dict, merge_timings]
@@ -0,0 +1,50 @@
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_stats = {
+    "jobs": 0,
+    "succeeded": 0,
+    "first_pass": 0,
+    "retries": 0,
+}
+_failures_by_stage = Counter()
+_exceptions = Counter()
+
+def record_failure(details: dict):
+    # Counted per attempt, so failures that a later fix recovered from still show up
+    with _lock:
+        _failures_by_stage[details["stage"]] += 1
+        _exceptions[details["exception_type"]] += 1
+
+def record_run(state: dict, succeeded: bool):
+    # Only runs that generated code count; cache hits never reach the fix loop
+    if state.get("cache_hit"):
+        return
+
+    retries = state.get("retries", 0)
+    with _lock:
+        _stats["jobs"] += 1
+        _stats["retries"] += retries
+        if succeeded:
+            _stats["succeeded"] += 1
+            if retries == 0:
+                _stats["first_pass"] += 1
+
+def pipeline_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        failures = dict(_failures_by_stage)
+        exceptions = dict(_exceptions.most_common(10))
+
+    jobs = stats["jobs"] or 1
+    return {
+        **stats,
+        "first_pass_success_rate": stats["first_pass"] / jobs,
+        "success_rate": stats["succeeded"] / jobs,
+        "avg_retries": stats["retries"] / jobs,
+        # One generation call plus one call per fix attempt
+        "avg_gemini_calls": (stats["jobs"] + stats["retries"]) / jobs,
+        "failures_by_stage": failures,
+        "top_exceptions": exceptions,
+    }
@@ -0,0 +1,97 @@
+import os
+import threading
+
+ADMISSION_SLO_SECONDS = float(os.getenv("ADMISSION_SLO_SECONDS", "300"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+ADMISSION_DEFAULT_JOB_SECONDS = float(os.getenv("ADMISSION_DEFAULT_JOB_SECONDS", "90"))
+
+# Weight of the newest job in the running average of job durations
+EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    # Estimates when a new job would finish from the live backlog and recent job durations
+    def __init__(self, capacity: int, slo_seconds: float = ADMISSION_SLO_SECONDS,
+                 max_queue: int = ADMISSION_MAX_QUEUE):
+        self.capacity = max(1, capacity)
+        self.slo_seconds = slo_seconds
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._job_seconds = ADMISSION_DEFAULT_JOB_SECONDS
+        self._admitted = 0
+        self._rejected = {"queue_full": 0, "over_slo": 0}
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._job_seconds += EWMA_ALPHA * (seconds - self._job_seconds)
+
+    def _avg_job_seconds(self) -> float:
+        with self._lock:
+            return self._job_seconds
+
+    def estimate(self, backlogs: dict, user_id=None) -> float:
+        # The fair queue serves users in turn, so a new job waits on its owner's own backlog plus
+        # at most one job per turn from everyone else, not on the global queue
+        own = backlogs.get(user_id, 0)
+        ahead = own + sum(min(count, own + 1) for key, count in backlogs.items() if key != user_id)
+
+        job_seconds = self._avg_job_seconds()
+        return ahead / self.capacity * job_seconds + job_seconds
+
+    def admit(self, user_id, queued: int, backlogs: dict, background: bool = False):
+        # `backlogs` maps each user to their queued plus running jobs; one heavy user's burst
+        # pushes only that user's own estimate past the objective. Background work makes no
+        # latency promise, so only the queue bound applies to it
+        estimate = self.estimate(backlogs, user_id)
+
+        # Once the queue is full only users who already have work waiting are turned away
+        if queued >= self.max_queue and backlogs.get(user_id, 0):
+            self._count("queue_full")
+            drain = (queued - self.max_queue + 1) / self.capacity * self._avg_job_seconds()
+            raise AdmissionRejected(503, "Render queue is full", drain)
+
+        if not background and estimate > self.slo_seconds:
+            self._count("over_slo")
+            raise AdmissionRejected(429, "Estimated completion time exceeds the service objective",
+                                    estimate - self.slo_seconds)
+
+        with self._lock:
+            self._admitted += 1
+
+    def _count(self, reason: str):
+        with self._lock:
+            self._rejected[reason] += 1
+
+    def state(self, queued: int, running: int, backlogs: dict) -> dict:
+        # Reported for a user with nothing in flight yet
+        estimate = self.estimate(backlogs)
+        if queued >= self.max_queue:
+            mode = "shedding"
+        elif estimate > self.slo_seconds:
+            mode = "degraded"
+        else:
+            mode = "open"
+
+        with self._lock:
+            return {
+                "state": mode,
+                "accepting": mode == "open",
+                "queued": queued,
+                "running": running,
+                "active_users": len(backlogs),
+                "capacity": self.capacity,
+                "estimated_wait_seconds": estimate,
+                "avg_job_seconds": self._job_seconds,
+                "slo_seconds": self.slo_seconds,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": dict(self._rejected),
+            }
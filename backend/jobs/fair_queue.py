@@ -0,0 +1,52 @@
+import heapq
+import itertools
+import threading
+from collections import Counter
+
+class FairQueue:
+    # Weighted fair queueing across keys (users): each item is tagged with its owner's virtual
+    # finish time, so a long backlog from one key cannot delay items another key submits later
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._vtime = 0.0
+        self._last_tag = {}
+        self._queued = Counter()
+
+    def put(self, key, item, weight: float = 1.0):
+        with self._cond:
+            tag = max(self._vtime, self._last_tag.get(key, 0.0)) + 1.0 / max(weight, 1e-6)
+            self._last_tag[key] = tag
+            self._queued[key] += 1
+            heapq.heappush(self._heap, (tag, next(self._seq), key, item))
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while not self._heap:
+                self._cond.wait()
+
+            tag, _, key, item = heapq.heappop(self._heap)
+            self._vtime = tag
+            self._queued[key] -= 1
+            if not self._queued[key]:
+                del self._queued[key]
+                del self._last_tag[key]
+            return item
+
+    def queued_by_key(self) -> dict:
+        with self._cond:
+            return dict(self._queued)
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._heap),
+                "users_waiting": len(self._queued),
+                "max_user_backlog": max(self._queued.values(), default=0),
+            }
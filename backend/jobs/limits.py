@@ -0,0 +1,70 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+
+class StageLimiter:
+    # Caps how many calls of one pipeline stage run at once across all jobs
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._async_semaphore = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._calls = 0
+        self._wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self):
+        started = time.perf_counter()
+        self._semaphore.acquire()
+        with self._lock:
+            self._active += 1
+            self._calls += 1
+            self._wait_seconds += time.perf_counter() - started
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        # Async callers queue on the event loop; at most `limit` of them ever reach the shared
+        # semaphore, so waiting for a slot never pins more than `limit` threads
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.limit)
+
+        started = time.perf_counter()
+        async with self._async_semaphore:
+            if not self._semaphore.acquire(blocking=False):
+                await asyncio.to_thread(self._semaphore.acquire)
+            with self._lock:
+                self._active += 1
+                self._calls += 1
+                self._wait_seconds += time.perf_counter() - started
+
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._active -= 1
+                self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "calls": self._calls,
+                "avg_wait_seconds": self._wait_seconds / self._calls if self._calls else 0.0,
+            }
+
+
+llm_limiter = StageLimiter("llm", LLM_CONCURRENCY)
@@ -0,0 +1,236 @@
+import asyncio
+import inspect
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from jobs.limits import LLM_CONCURRENCY
+from jobs.fair_queue import FairQueue
+from render.scheduler import RENDER_CONCURRENCY
+
+# Jobs mostly wait on the LLM or on a render worker; the stage limits do the real bounding
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(LLM_CONCURRENCY + (os.cpu_count() or 2))))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "1000"))
+# Only as many coroutine jobs run as the LLM and render stages can serve at once; the rest wait
+# in the fair queue, since the stage limits downstream serve their waiters FIFO
+JOB_ASYNC_CONCURRENCY = int(os.getenv("JOB_ASYNC_CONCURRENCY", str(LLM_CONCURRENCY + RENDER_CONCURRENCY)))
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: int
+    prompt: str
+    options: dict = field(default_factory=dict)
+    status: str = "queued"
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: Future = field(default_factory=Future, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "prompt": self.prompt,
+            "result": self.result,
+            "error": self.error,
+            "timings": self.timings,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class JobQueue:
+    # runner(job) executes on a worker thread, or on the queue's event loop when it is
+    # a coroutine function; its return value becomes the job result and any exception
+    # marks the job as failed.
+    def __init__(self, runner: Callable[[Job], Any], workers: int = JOB_WORKERS):
+        self.runner = runner
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = FairQueue()
+        self._running = 0
+        self._running_by_user = Counter()
+
+        if inspect.iscoroutinefunction(runner):
+            self._start_loop(workers)
+            return
+
+        for i in range(max(1, workers)):
+            threading.Thread(
+                target=self._work,
+                name=f"job-worker-{i}",
+                daemon=True
+            ).start()
+
+    def _start_loop(self, workers: int):
+        # Short blocking calls (SQLite, checkpoints) use the loop's default executor; the
+        # long render and merge stages bring their own (see graph.pipeline.STAGE_EXECUTORS)
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job-worker")
+        )
+        self._slots = threading.BoundedSemaphore(max(1, JOB_ASYNC_CONCURRENCY))
+
+        threading.Thread(target=self._loop.run_forever, name="job-loop", daemon=True).start()
+        threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True).start()
+
+    def submit(self, user_id: int, prompt: str, options: Optional[dict] = None, weight: float = 1.0) -> Job:
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, prompt=prompt, options=options or {})
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+
+        # Queued per user so one user's backlog cannot hold back everyone else's jobs
+        self._queue.put(user_id, job, weight)
+        return job
+
+    def record(self, user_id: int, prompt: str, result: Any = None, error: Optional[str] = None) -> Job:
+        # Registers a job that was answered without running, e.g. from the result cache or a rejection
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            prompt=prompt,
+            status="failed" if error else "completed",
+            result=result,
+            error=error,
+            started_at=now,
+            finished_at=now
+        )
+        job.done.set_result(job)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+
+        return job
+
+    def attach(self, user_id: int, prompt: str, future: Future, finisher: Callable[[Job, Any], Any]) -> Job:
+        # The job waits on another computation instead of occupying a worker;
+        # finisher(job, value) turns that computation's value into this job's result
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, prompt=prompt)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+
+        future.add_done_callback(
+            lambda f: self._execute(job, lambda j: finisher(j, f.result()))
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def load(self) -> tuple:
+        # (queued, running) for jobs that occupy a worker
+        with self._lock:
+            running = self._running
+        return self._queue.qsize(), running
+
+    def backlogs(self) -> dict:
+        # Queued plus running jobs per user, i.e. each user's position in the fair queue
+        backlogs = Counter(self._queue.queued_by_key())
+        with self._lock:
+            backlogs.update(self._running_by_user)
+        return dict(backlogs)
+
+    def stats(self) -> dict:
+        queued, running = self.load()
+        return {**self._queue.stats(), "running": running}
+
+    def _enter(self, job: Job):
+        with self._lock:
+            self._running += 1
+            self._running_by_user[job.user_id] += 1
+
+    def _leave(self, job: Job):
+        with self._lock:
+            self._running -= 1
+            self._running_by_user[job.user_id] -= 1
+            if not self._running_by_user[job.user_id]:
+                del self._running_by_user[job.user_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            self._enter(job)
+
+            try:
+                self._execute(job, self.runner)
+            finally:
+                self._leave(job)
+
+    def _dispatch(self):
+        # A slot is taken before dequeuing, so jobs beyond the limit stay in the fair queue
+        while True:
+            self._slots.acquire()
+            job = self._queue.get()
+            self._enter(job)
+
+            future = asyncio.run_coroutine_threadsafe(self._aexecute(job), self._loop)
+            future.add_done_callback(lambda f, job=job: self._release_slot(job))
+
+    def _release_slot(self, job: Job):
+        self._leave(job)
+        self._slots.release()
+
+    def _execute(self, job: Job, fn: Callable[[Job], Any]):
+        self._begin(job)
+
+        try:
+            job.result = fn(job)
+            job.status = "completed"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            self._end(job)
+
+    async def _aexecute(self, job: Job):
+        self._begin(job)
+
+        try:
+            job.result = await self.runner(job)
+            job.status = "completed"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            self._end(job)
+
+    def _begin(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+
+    def _end(self, job: Job):
+        job.finished_at = time.time()
+        job.done.set_result(job)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once the history limit is exceeded
+        excess = len(self._jobs) - JOB_HISTORY_LIMIT
+        if excess <= 0:
+            return
+
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in FINISHED_STATUSES:
+                del self._jobs[job_id]
+                excess -= 1
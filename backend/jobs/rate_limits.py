@@ -0,0 +1,79 @@
+import math
+import os
+import threading
+import time
+
+VIDEO_JOB_BURST = int(os.getenv("VIDEO_JOB_BURST", "10"))
+VIDEO_JOBS_PER_HOUR = int(os.getenv("VIDEO_JOBS_PER_HOUR", "30"))
+CHAT_MESSAGE_BURST = int(os.getenv("CHAT_MESSAGE_BURST", "10"))
+CHAT_MESSAGES_PER_MINUTE = int(os.getenv("CHAT_MESSAGES_PER_MINUTE", "20"))
+TTS_CHAR_BURST = int(os.getenv("TTS_CHAR_BURST", "20000"))
+TTS_CHARS_PER_HOUR = int(os.getenv("TTS_CHARS_PER_HOUR", "50000"))
+
+PRUNE_EVERY = 1000
+
+class RateLimiter:
+    # One token bucket per key: `burst` tokens at most, refilled at `rate` tokens per second
+    def __init__(self, name: str, burst: int, rate: float):
+        self.name = name
+        self.burst = max(1, burst)
+        self.rate = rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._allowed = 0
+        self._rejected = 0
+
+    def _level(self, key, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def take(self, key, amount: int = 1) -> float:
+        # Returns 0 when allowed, otherwise the seconds until `amount` tokens will be available
+        amount = min(amount, self.burst)
+        now = time.monotonic()
+
+        with self._lock:
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                self._prune(now)
+
+            tokens = self._level(key, now)
+            if tokens >= amount:
+                self._buckets[key] = (tokens - amount, now)
+                self._allowed += 1
+                return 0.0
+
+            self._buckets[key] = (tokens, now)
+            self._rejected += 1
+            return (amount - tokens) / self.rate if self.rate else math.inf
+
+    def _prune(self, now: float):
+        # A full bucket is the same as no bucket
+        for key in [k for k in self._buckets if self._level(k, now) >= self.burst]:
+            del self._buckets[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "burst": self.burst,
+                "rate_per_second": self.rate,
+                "tracked_keys": len(self._buckets),
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+            }
+
+
+def retry_after_seconds(seconds: float) -> int:
+    return max(1, math.ceil(seconds))
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(retry_after_seconds(seconds))}
+
+
+video_limiter = RateLimiter("video_jobs", VIDEO_JOB_BURST, VIDEO_JOBS_PER_HOUR / 3600)
+chat_limiter = RateLimiter("chat_messages", CHAT_MESSAGE_BURST, CHAT_MESSAGES_PER_MINUTE / 60)
+tts_limiter = RateLimiter("tts_chars", TTS_CHAR_BURST, TTS_CHARS_PER_HOUR / 3600)
+
+def rate_limit_stats() -> dict:
+    return {limiter.name: limiter.stats() for limiter in (video_limiter, chat_limiter, tts_limiter)}
@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    # Concurrent callers with the same key share one in-flight computation
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def join(self, key: str):
+        with self._lock:
+            future = self._calls.get(key)
+            if future:
+                self._followers += 1
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            self._leaders += 1
+            return future, True
+
+    def _pop(self, key: str):
+        with self._lock:
+            return self._calls.pop(key, None)
+
+    def resolve(self, key: str, result):
+        future = self._pop(key)
+        if future:
+            future.set_result(result)
+
+    def fail(self, key: str, error: Exception):
+        future = self._pop(key)
+        if future:
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self._leaders + self._followers
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self._leaders,
+                "coalesced": self._followers,
+                "coalesce_rate": self._followers / requests if requests else 0.0,
+            }
@@ -0,0 +1,52 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Upgrades only run while the pool has no preview waiting, so a small pool is enough
+UPGRADE_WORKERS = int(os.getenv("UPGRADE_WORKERS", "2"))
+UPGRADE_MAX_ATTEMPTS = int(os.getenv("UPGRADE_MAX_ATTEMPTS", "2"))
+
+logger = logging.getLogger("VideoUpgrader")
+
+
+class VideoUpgrader:
+    # upgrade(key) re-renders one cached result at the higher tier; a key is never upgraded twice at once
+    def __init__(self, upgrade: Callable[[str], None], workers: int = UPGRADE_WORKERS):
+        self.upgrade = upgrade
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upgrade")
+        self._pending = set()
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._stats = {"scheduled": 0, "completed": 0, "failed": 0}
+
+    def schedule(self, key: str):
+        with self._lock:
+            if key in self._pending or self._failures.get(key, 0) >= UPGRADE_MAX_ATTEMPTS:
+                return
+            self._pending.add(key)
+            self._stats["scheduled"] += 1
+
+        self._executor.submit(self._run, key)
+
+    def _run(self, key: str):
+        try:
+            self.upgrade(key)
+            outcome = "completed"
+        except Exception as e:
+            logger.error(f"Upgrade of {key} failed: {e}")
+            outcome = "failed"
+
+        with self._lock:
+            self._pending.discard(key)
+            self._stats[outcome] += 1
+            if outcome == "failed":
+                self._failures[key] = self._failures.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
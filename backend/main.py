@@ -1,4 +1,8 @@
 import os
+import json
+import time
+import asyncio
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,13 +10,30 @@ load_dotenv()
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-from storage.cache import get_cached_result, save_cached_result
+from storage.chat_log import read_history
+from storage.chat_writer import ChatWriteBehind
+from utils.loop_monitor import LoopLagMonitor
+from agents.tutor_context import TutorContext, session_stats, estimate_tokens
+from agents.cache_agent import find_cached_result, lookup_cache, promote_cached_video, cache_stats
+from storage.llm_memo import memo_stats, memo_scope
 import google.generativeai as genai
 from elevenlabs.client import ElevenLabs
 from graph.pipeline import build_pipeline
+from graph.pipeline_stats import record_run, pipeline_stats
+from render.cache import render_cache_stats
+from storage.tts_cache import tts_cache_stats
+from graph.checkpoints import open_checkpoint, load_checkpoint, delete_checkpoint, resume_stage
 from agents.langgraph_nodes import init_agents
-from database import engine, Base, get_db
+from database import engine, Base, get_db, SessionLocal, ensure_column
+from jobs.queue import JobQueue
+from jobs.single_flight import SingleFlight
+from jobs.upgrades import VideoUpgrader
+from jobs.admission import AdmissionController, AdmissionRejected
+from jobs.rate_limits import video_limiter, chat_limiter, retry_after_seconds, retry_after_header, rate_limit_stats
+from jobs.limits import llm_limiter
+from utils.prompt_normalizer import prompt_cache_key
 from models import User
 from auth import get_password_hash, verify_password, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
 from sqlalchemy.orm import Session
@@ -20,11 +41,19 @@ from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
 from models import User, Video
 from datetime import datetime
+from typing import Optional, List
 
 Base.metadata.create_all(bind=engine)
+ensure_column("videos", "tier", "VARCHAR DEFAULT 'preview'")
+ensure_column("users", "job_weight", "FLOAT DEFAULT 1.0")
 
 class PromptRequest(BaseModel):
     prompt: str
+    allow_similar: bool = True
+
+class BatchPromptRequest(BaseModel):
+    prompts: List[str]
+    allow_similar: bool = True
 
 class UserCreate(BaseModel):
     email: str
@@ -57,6 +86,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+TUTOR_INSTRUCTION = "You are a helpful math tutor. Explain concepts clearly."
+
 VIDEOS_DIR = "videos"
 AUDIO_DIR = "audio"
 SCRIPTS_DIR = "temp_scripts"
@@ -76,6 +107,9 @@ agents = init_agents(
 
 pipeline = build_pipeline(agents)
 
+chat_writer = ChatWriteBehind()
+loop_monitor = LoopLagMonitor()
+
 @app.get("/")
 def health_check():
     return {
@@ -84,6 +118,48 @@ def health_check():
         "agents": list(agents.keys())
     }
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "gemini_stream": agents["gemini"].stream_stats(),
+        "render": agents["render"].pool.stats(),
+        "render_scheduler": agents["render"].pool.scheduler.stats(),
+        "render_cache": render_cache_stats(),
+        "tts_cache": tts_cache_stats(),
+        "result_cache": cache_stats(),
+        "llm_memo": memo_stats(),
+        "chat_writer": chat_writer.stats(),
+        "event_loop": loop_monitor.stats(),
+        "single_flight": single_flight.stats(),
+        "llm_limiter": llm_limiter.stats(),
+        "pipeline": pipeline_stats(),
+        "upgrades": video_upgrader.stats(),
+        "job_queue": job_queue.stats(),
+        "rate_limits": rate_limit_stats(),
+        "admission": admission.state(*job_queue.load(), job_queue.backlogs()),
+    }
+
+@app.get("/admission")
+def admission_status():
+    # Load balancers can poll this and route around a node that is not accepting work
+    state = admission.state(*job_queue.load(), job_queue.backlogs())
+    return JSONResponse(state, status_code=200 if state["accepting"] else 503)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    chat_writer.start()
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await chat_writer.stop()
+    loop_monitor.stop()
+
+@app.on_event("shutdown")
+def shutdown_render_pool():
+    video_upgrader.shutdown()
+    agents["render"].pool.shutdown()
+
 # @app.post("/generate-video")
 # def generate_video(req: PromptRequest):
 #     initial_state = {
@@ -113,16 +189,59 @@ def health_check():
 #         )
 #     }
 
-@app.post("/generate-video")
-def generate_video(
-    req: PromptRequest, 
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)                   
-):
-    initial_state = {
-        "prompt": req.prompt,
+def save_video(user_id: int, prompt: str, video_file: str, audio_file=None, tier: str = "preview"):
+    db = SessionLocal()
+    try:
+        new_video = Video(
+            user_id=user_id,
+            prompt=prompt,
+            video_filename=os.path.basename(video_file),
+            audio_filename=os.path.basename(audio_file) if audio_file else None,
+            tier=tier
+        )
+        db.add(new_video)
+        db.commit()
+        db.refresh(new_video)
+    finally:
+        db.close()
+
+    response = {
+        "videoUrl": f"http://localhost:8000/videos/{new_video.video_filename}",
+        "audioUrl": None,
+        "prompt": new_video.prompt,
+        "tier": new_video.tier,
+        "timestamp": new_video.created_at.isoformat()
+    }
+
+    if new_video.audio_filename:
+        response["audioUrl"] = f"http://localhost:8000/audio/{new_video.audio_filename}"
+
+    return response
+
+def resumed_state(job, checkpoint_id: str) -> dict:
+    checkpoint = load_checkpoint(checkpoint_id)
+    if not checkpoint:
+        raise RuntimeError("No checkpoint to resume from")
+
+    state = checkpoint["state"]
+    # A resumed job gets a fresh retry budget; the script and narration are reused
+    return {
+        **state,
+        "job_id": job.id,
+        "resume_stage": resume_stage(state),
+        "retries": 0,
+        "timings": {},
+    }
+
+async def produce_video(job):
+    resume_from = job.options.get("resume_from")
+    initial_state = await asyncio.to_thread(resumed_state, job, resume_from) if resume_from else {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "prompt": job.prompt,
+        "allow_similar": job.options.get("allow_similar", True),
         "manim_code": None,
-        "transcript": f"Explaining {req.prompt}",
+        "transcript": f"Explaining {job.prompt}",
         "script_path": None,
         "video_path": None,
         "audio_path": None,
@@ -131,36 +250,312 @@ def generate_video(
         "retries": 0,
         "scripts_dir": SCRIPTS_DIR,
         "videos_dir": VIDEOS_DIR,
+        "timings": {},
     }
 
-    result = pipeline.invoke(initial_state)
+    await asyncio.to_thread(open_checkpoint, job.id, job.user_id, initial_state)
+    if resume_from:
+        await asyncio.to_thread(delete_checkpoint, resume_from)
+
+    # Responses from a failed run are dropped from the memo, so a retry is not a replay
+    with memo_scope() as memos:
+        try:
+            result = await pipeline.ainvoke(initial_state)
+        except Exception:
+            await asyncio.to_thread(memos.discard)
+            raise
+
+    admission.observe(time.time() - job.started_at)
+    job.timings = {"queue_wait": job.started_at - job.created_at, **result.get("timings", {})}
 
     video_file = result.get("final_video_path") or result.get("video_path")
+    succeeded = bool(video_file) and os.path.exists(video_file)
+    record_run(result, succeeded)
+
+    if not succeeded:
+        await asyncio.to_thread(memos.discard)
+        raise RuntimeError(result.get("error") or "Video generation failed.")
+
+    await asyncio.to_thread(delete_checkpoint, job.id)
+
+    # Fresh renders are previews; the higher tier is produced in the background
+    upgrade_key = None if result.get("cache_hit") else result.get("cache_key")
+    return (video_file, result.get("audio_path"), result.get("video_tier") or "preview"), upgrade_key
+
+async def run_video_job(job):
+    flight_key = job.options.get("flight_key")
+
+    # Resolving a flight runs its followers' database writes, so it happens off the loop
+    try:
+        artifacts, upgrade_key = await produce_video(job)
+    except Exception as e:
+        await asyncio.to_thread(single_flight.fail, flight_key, e)
+        raise
+
+    await asyncio.to_thread(single_flight.resolve, flight_key, artifacts)
+    saved = await asyncio.to_thread(save_video, job.user_id, job.prompt, *artifacts)
+
+    # Scheduled after every row for this preview exists, so the swap reaches all of them
+    if upgrade_key:
+        video_upgrader.schedule(upgrade_key)
+    return saved
+
+def save_coalesced_video(job, artifacts):
+    return save_video(job.user_id, job.prompt, *artifacts)
+
+def swap_video_file(old_filename: str, new_filename: str, tier: str):
+    # One UPDATE, so readers see either the old file or the new one for every row
+    db = SessionLocal()
+    try:
+        db.query(Video).filter(Video.video_filename == old_filename).update(
+            {"video_filename": new_filename, "tier": tier},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+# How long a replaced preview stays on disk for clients that were already streaming it
+PREVIEW_GRACE_SECONDS = float(os.getenv("PREVIEW_GRACE_SECONDS", "600"))
+
+def retire_preview(preview_path: str, upgraded_filename: str):
+    # Rows saved from the preview during the grace period are moved over before the file goes;
+    # the render cache holds its own link, so only this copy is removed
+    swap_video_file(os.path.basename(preview_path), upgraded_filename, "hq")
+    try:
+        os.remove(preview_path)
+    except OSError:
+        pass
 
-    if not video_file or not os.path.exists(video_file):
-        raise HTTPException(status_code=500, detail="Video generation failed.")
+def upgrade_video(cache_key: str):
+    cached = lookup_cache(cache_key)
+    if not cached or cached.get("tier") == "hq":
+        return
 
-    new_video = Video(
-        user_id=current_user.id,
-        prompt=req.prompt,
-        video_filename=os.path.basename(video_file),
-        audio_filename=os.path.basename(result["audio_path"]) if result.get("audio_path") else None
+    script_path = os.path.join(SCRIPTS_DIR, f"upgrade_{cache_key}.py")
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(cached["manim_code"])
+
+    try:
+        render = agents["render"].upgrade(script_path, VIDEOS_DIR)
+    finally:
+        os.remove(script_path)
+
+    if not render.success:
+        raise RuntimeError(render.error)
+
+    video_path = render.data
+    if cached.get("audio_path"):
+        merged = agents["media_sync"].run(video_path, cached["audio_path"], VIDEOS_DIR)
+        os.remove(video_path)
+        if not merged["success"]:
+            raise RuntimeError(merged["error"])
+        video_path = merged["data"]
+
+    # The file is complete before any record points at it; the preview is kept for the grace period, then retired
+    upgraded = promote_cached_video(cache_key, video_path, "hq")
+    if upgraded:
+        swap_video_file(os.path.basename(cached["video_path"]), os.path.basename(upgraded), "hq")
+        if os.path.abspath(upgraded) != os.path.abspath(cached["video_path"]):
+            timer = threading.Timer(
+                PREVIEW_GRACE_SECONDS, retire_preview, (cached["video_path"], os.path.basename(upgraded))
+            )
+            timer.daemon = True
+            timer.start()
+
+job_queue = JobQueue(run_video_job)
+single_flight = SingleFlight()
+video_upgrader = VideoUpgrader(upgrade_video)
+admission = AdmissionController(agents["render"].pool.scheduler.limit)
+
+MAX_BATCH_SIZE = 100
+# Batch items are pre-generation, so they get a smaller share of the fair queue than interactive jobs
+BATCH_JOB_WEIGHT = float(os.getenv("BATCH_JOB_WEIGHT", "0.25"))
+
+def start_video_job(user_id: int, prompt: str, allow_similar: bool, weight: float = 1.0, background: bool = False):
+    cached = find_cached_result(prompt, allow_similar=allow_similar)
+    if cached:
+        tier = cached.get("tier", "preview")
+        result = save_video(user_id, prompt, cached["video_path"], cached.get("audio_path"), tier)
+        if tier != "hq":
+            video_upgrader.schedule(cached["cache_key"])
+        return job_queue.record(user_id, prompt, result)
+
+    # Identical requests already running are attached to that run instead of starting another
+    flight_key = f"{prompt_cache_key(prompt)}:{int(allow_similar)}"
+    flight, is_leader = single_flight.join(flight_key)
+
+    if is_leader:
+        # Only work that would occupy a worker is subject to admission; cache hits and followers are cheap
+        try:
+            admission.admit(user_id, job_queue.load()[0], job_queue.backlogs(), background)
+        except AdmissionRejected as e:
+            single_flight.fail(flight_key, e)
+            raise
+
+        return job_queue.submit(
+            user_id,
+            prompt,
+            {"allow_similar": allow_similar, "flight_key": flight_key},
+            weight
+        )
+
+    return job_queue.attach(user_id, prompt, flight, save_coalesced_video)
+
+def charge_video_token(user_id: int):
+    retry_after = video_limiter.take(user_id)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Video generation rate limit exceeded",
+            headers=retry_after_header(retry_after)
+        )
+
+@app.post("/generate-video", status_code=status.HTTP_202_ACCEPTED)
+async def generate_video(
+    req: PromptRequest, 
+    current_user: User = Depends(get_current_user)
+):
+    charge_video_token(current_user.id)
+
+    try:
+        job = await asyncio.to_thread(
+            start_video_job, current_user.id, req.prompt, req.allow_similar, current_user.job_weight or 1.0
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers=retry_after_header(e.retry_after))
+
+    response = {"jobId": job.id, "status": job.status}
+    if job.status == "completed":
+        response["result"] = job.result
+    return response
+
+def summarize_batch(jobs: list, wall_seconds: float) -> dict:
+    stage_seconds = {}
+    for job in jobs:
+        for stage, seconds in job.timings.items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+
+    timed_jobs = sum(1 for job in jobs if job.timings) or 1
+    return {
+        "total": len(jobs),
+        "completed": sum(1 for job in jobs if job.status == "completed"),
+        "failed": sum(1 for job in jobs if job.status == "failed"),
+        "wall_seconds": wall_seconds,
+        "stage_seconds": stage_seconds,
+        "avg_stage_seconds": {stage: total / timed_jobs for stage, total in stage_seconds.items()},
+    }
+
+@app.post("/generate-video/batch")
+def generate_video_batch(
+    req: BatchPromptRequest,
+    current_user: User = Depends(get_current_user)
+):
+    if not req.prompts or len(req.prompts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch must contain 1-{MAX_BATCH_SIZE} prompts")
+
+    # A batch is one request against the rate limit; its items queue at a lower weight instead
+    charge_video_token(current_user.id)
+
+    started = time.perf_counter()
+    weight = (current_user.job_weight or 1.0) * BATCH_JOB_WEIGHT
+
+    # Items the queue cannot take come back as failed items instead of failing the batch
+    jobs = []
+    for prompt in req.prompts:
+        try:
+            jobs.append(start_video_job(current_user.id, prompt, req.allow_similar, weight, background=True))
+        except AdmissionRejected as e:
+            error = f"{e.reason}; retry in {retry_after_seconds(e.retry_after)}s"
+            jobs.append(job_queue.record(current_user.id, prompt, error=error))
+
+    # Streams one NDJSON line per item as it finishes, then a summary line
+    async def stream():
+        pending = {asyncio.wrap_future(job.done): index for index, job in enumerate(jobs)}
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                yield json.dumps({"index": index, **jobs[index].to_dict()}) + "\n"
+
+        yield json.dumps({"summary": summarize_batch(jobs, time.perf_counter() - started)}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = job_queue.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.post("/jobs/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_job(job_id: str, current_user: User = Depends(get_current_user)):
+    checkpoint = load_checkpoint(job_id)
+    if not checkpoint or checkpoint["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="No resumable checkpoint for this job")
+
+    job = job_queue.get(job_id)
+    if job and job.status != "failed":
+        raise HTTPException(status_code=409, detail="Only failed jobs can be resumed")
+
+    # A resume restarts the fix loop and the render, so it costs a video token like a new job
+    charge_video_token(current_user.id)
+
+    try:
+        admission.admit(current_user.id, job_queue.load()[0], job_queue.backlogs())
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers=retry_after_header(e.retry_after))
+
+    state = checkpoint["state"]
+    resumed = job_queue.submit(
+        current_user.id,
+        state["prompt"],
+        {"resume_from": job_id, "allow_similar": state.get("allow_similar", True)},
+        current_user.job_weight or 1.0
     )
-    db.add(new_video)
-    db.commit()
-    db.refresh(new_video)
 
-    response = {
-        "videoUrl": f"http://localhost:8000/videos/{new_video.video_filename}",
-        "audioUrl": None,
-        "prompt": new_video.prompt,
-        "timestamp": new_video.created_at
+    return {
+        "jobId": resumed.id,
+        "status": resumed.status,
+        "resumedFrom": job_id,
+        "stage": resume_stage(state),
     }
 
-    if new_video.audio_filename:
-        response["audioUrl"] = f"http://localhost:8000/audio/{new_video.audio_filename}"
-    
-    return response
+def token_user_id(token: str):
+    db = SessionLocal()
+    try:
+        return get_current_user(token, db).id
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+@app.websocket("/ws/jobs/{job_id}")
+async def websocket_job(websocket: WebSocket, job_id: str, token: str = ""):
+    await websocket.accept()
+
+    # Browsers cannot set headers on a WebSocket, so the bearer token comes as ?token=
+    user_id = await asyncio.to_thread(token_user_id, token) if token else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # Same ownership rule as GET /jobs/{job_id}: someone else's job looks like no job at all
+    job = job_queue.get(job_id)
+    if not job or job.user_id != user_id:
+        await websocket.send_json({"jobId": job_id, "status": "unknown"})
+        await websocket.close()
+        return
+
+    try:
+        await websocket.send_json(job.to_dict())
+        await asyncio.wrap_future(job.done)
+        await websocket.send_json(job.to_dict())
+        await websocket.close()
+    except WebSocketDisconnect:
+        print(f"Job subscriber {job_id} disconnected")
 
 @app.get("/api/history") 
 def get_video_history(
@@ -174,6 +569,7 @@ def get_video_history(
         history.append({
             "videoUrl": f"http://localhost:8000/videos/{vid.video_filename}",
             "prompt": vid.prompt,
+            "tier": vid.tier or "preview",
             "timestamp": vid.created_at
         })
     return history
@@ -225,49 +621,79 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     }
 
 @app.get("/chat/history/{session_id}")
-def get_chat_history(session_id: str):
-    history = get_cached_result(f"chat_{session_id}")
-    return history if history else []
+async def get_chat_history(session_id: str, limit: Optional[int] = None, before: Optional[int] = None):
+    await chat_writer.flush()
+    return await asyncio.to_thread(read_history, session_id, limit, before)
+
+@app.get("/chat/stats/{session_id}")
+def get_chat_stats(session_id: str):
+    return session_stats.get(session_id, {})
+
+def session_user_id(session_id: str):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.session_id == session_id).first()
+        return user.id if user else None
+    finally:
+        db.close()
 
 @app.websocket("/ws/chat/{session_id}")
 async def websocket_chat(websocket: WebSocket, session_id: str):
     await websocket.accept()
 
-    history_key = f"chat_{session_id}"
-    existing_history = get_cached_result(history_key) or []
-    
-    gemini_history = []
-    for msg in existing_history:
-        gemini_history.append({
-            "role": msg["role"],
-            "parts": [msg["content"]]
-        })
+    # The rate limit follows the account, so minting new session ids does not reset it
+    user_id = await asyncio.to_thread(session_user_id, session_id)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
 
-    tutor_model = genai.GenerativeModel(
-        "models/gemini-2.5-flash",
-        system_instruction="You are a helpful math tutor. Explain concepts clearly."
-    )
-    chat_session = tutor_model.start_chat(history=gemini_history)
+    await chat_writer.flush()
+    context = await TutorContext.load(session_id, gemini_model)
 
     try:
         while True:
             user_input = await websocket.receive_text()
-            
-            existing_history.append({"role": "user", "content": user_input})
-            save_cached_result(history_key, existing_history)
 
-            response_stream = await chat_session.send_message_async(user_input, stream=True)
+            retry_after = chat_limiter.take(user_id)
+            if retry_after:
+                await websocket.send_text(
+                    f"You're sending messages too quickly. Please wait {retry_after_seconds(retry_after)}s."
+                )
+                await websocket.send_text("")
+                continue
+            
+            chat_writer.append(session_id, "user", user_input)
+
+            # Each turn sends only the summary plus a bounded window of recent turns
+            system_instruction = context.system_instruction(TUTOR_INSTRUCTION)
+            contents = context.build_contents(user_input)
+            prompt_tokens = estimate_tokens(system_instruction) + sum(
+                estimate_tokens(part) for msg in contents for part in msg["parts"]
+            )
+
+            tutor_model = genai.GenerativeModel(
+                "models/gemini-2.5-flash",
+                system_instruction=system_instruction
+            )
+
+            started = time.perf_counter()
+            ttft = None
+            response_stream = await tutor_model.generate_content_async(contents, stream=True)
             
             full_response = ""
             async for chunk in response_stream:
                 if chunk.text:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
                     full_response += chunk.text
                     await websocket.send_text(chunk.text)
             
             await websocket.send_text("")
 
-            existing_history.append({"role": "model", "content": full_response})
-            save_cached_result(history_key, existing_history)
+            chat_writer.append(session_id, "model", full_response)
+            context.record_turn(user_input, full_response, prompt_tokens, ttft or time.perf_counter() - started)
+            context.schedule_compaction()
 
     except WebSocketDisconnect:
         print(f"Session {session_id} disconnected")
+        await chat_writer.flush()
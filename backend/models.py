@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float
 from sqlalchemy.orm import relationship
 from database import Base
 import uuid
@@ -11,6 +11,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     session_id = Column(String, default=lambda: uuid.uuid4().hex, unique=True)
+    # Share of the job queue relative to other users with waiting jobs; 2.0 is served twice as often
+    job_weight = Column(Float, default=1.0)
     videos = relationship("Video", back_populates="owner")
 
 class Video(Base):
@@ -21,5 +23,6 @@ class Video(Base):
     prompt = Column(String)
     video_filename = Column(String)
     audio_filename = Column(String, nullable=True)
+    tier = Column(String, default="preview")
     created_at = Column(DateTime, default=datetime.utcnow)
     owner = relationship("User", back_populates="videos")
\ No newline at end of file
@@ -1,6 +1,5 @@
 import uuid, os
 from agents.test_agent import TestAgent
-from agents.render_agent import RenderAgent
 
 class VideoOrchestrator:
     def __init__(
@@ -8,17 +7,18 @@ class VideoOrchestrator:
         manim_agent,
         align_agent,
         audio_agent,
+        render_agent,
         scripts_dir,
         videos_dir
     ):
         self.manim_agent = manim_agent
         self.align_agent = align_agent
         self.audio_agent = audio_agent
+        self.render_agent = render_agent
         self.scripts_dir = scripts_dir
         self.videos_dir = videos_dir
 
         self.test_agent = TestAgent()
-        self.render_agent = RenderAgent()
 
     def run(self, topic: str):
         manim = self.manim_agent.run(topic)
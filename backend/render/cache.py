@@ -0,0 +1,55 @@
+import ast
+import hashlib
+import os
+from importlib import metadata
+from storage.file_lru import FileLRU, materialize
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join("media", "render_cache"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Frame rates of Manim's quality presets; part of the key so a preset change never serves stale video
+QUALITY_FRAME_RATES = {
+    "low_quality": 15,
+    "medium_quality": 30,
+    "high_quality": 60,
+    "production_quality": 60,
+    "fourk_quality": 60,
+}
+
+_cache = FileLRU("render_cache", RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES, ".mp4")
+
+def _manim_version() -> str:
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+MANIM_VERSION = _manim_version()
+
+def normalize_script(code: str) -> str:
+    # The AST ignores comments, blank lines and quoting style, none of which change the rendered scene
+    try:
+        return ast.dump(ast.parse(code))
+    except SyntaxError:
+        return "\n".join(line.rstrip() for line in code.strip().splitlines())
+
+def render_key(code: str, quality: str) -> str:
+    settings = f"{quality}\0{QUALITY_FRAME_RATES.get(quality)}\0{MANIM_VERSION}"
+    return hashlib.sha256(f"{settings}\0{normalize_script(code)}".encode()).hexdigest()
+
+def get_render(key: str, target: str) -> bool:
+    cached_path = _cache.get(key)
+    if not cached_path:
+        return False
+
+    materialize(cached_path, target)
+    return True
+
+def has_render(key: str) -> bool:
+    return _cache.contains(key)
+
+def save_render(key: str, video_path: str):
+    _cache.save(key, video_path)
+
+def render_cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# A low-quality Cairo render peaks at a few hundred MB; leave headroom for higher presets
+RENDER_MEMORY_MB = int(os.getenv("RENDER_MEMORY_MB", "1024"))
+
+# Lower values are served first; previews are what a user is waiting on
+PRIORITY_PREVIEW = 0
+PRIORITY_UPGRADE = 10
+
+PRIORITY_NAMES = {PRIORITY_PREVIEW: "preview", PRIORITY_UPGRADE: "upgrade"}
+
+def _available_cpus() -> int:
+    # Respects container CPU sets, unlike os.cpu_count()
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 2
+
+def _available_memory_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def render_concurrency() -> int:
+    # One render keeps a core busy; beyond that, memory is what makes concurrent renders thrash
+    limit = _available_cpus()
+    memory = _available_memory_mb()
+    if memory is not None:
+        limit = min(limit, memory // max(1, RENDER_MEMORY_MB))
+    return max(1, limit)
+
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", "0")) or render_concurrency()
+
+def _percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class RenderScheduler:
+    # Global render admission: at most `limit` renders run, waiters are served by priority then FIFO
+    def __init__(self, limit: int = RENDER_CONCURRENCY, window: int = 1000):
+        self.limit = max(1, limit)
+        # Priority only orders waiters, so a slot is kept back for previews; with a single slot
+        # upgrades still run, but only while no preview is waiting
+        self.background_limit = max(1, self.limit - 1)
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._tickets = itertools.count()
+        self._active = 0
+        self._active_background = 0
+        self._waits = {name: deque(maxlen=window) for name in PRIORITY_NAMES.values()}
+        self._runs = {name: deque(maxlen=window) for name in PRIORITY_NAMES.values()}
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_PREVIEW):
+        queued = time.perf_counter()
+        self._acquire(priority)
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self._release(priority, started - queued, time.perf_counter() - started)
+
+    def _blocked(self, priority: int) -> bool:
+        if self._active >= self.limit:
+            return True
+        return priority > PRIORITY_PREVIEW and self._active_background >= self.background_limit
+
+    def _acquire(self, priority: int):
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiters, ticket)
+            while self._blocked(priority) or self._waiters[0] != ticket:
+                self._cond.wait()
+
+            heapq.heappop(self._waiters)
+            self._active += 1
+            if priority > PRIORITY_PREVIEW:
+                self._active_background += 1
+            self._cond.notify_all()
+
+    def _release(self, priority: int, waited: float, ran: float):
+        name = PRIORITY_NAMES.get(priority, "upgrade")
+        with self._cond:
+            self._active -= 1
+            if priority > PRIORITY_PREVIEW:
+                self._active_background -= 1
+            self._waits[name].append(waited)
+            self._runs[name].append(ran)
+            self._cond.notify_all()
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._waiters)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = {
+                "limit": self.limit,
+                "background_limit": self.background_limit,
+                "active": self._active,
+                "active_background": self._active_background,
+                "queued": len(self._waiters),
+            }
+            samples = {name: (list(self._waits[name]), list(self._runs[name])) for name in self._waits}
+
+        for name, (waits, runs) in samples.items():
+            stats[name] = {
+                "renders": len(runs),
+                "avg_queue_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+                "p99_queue_wait_seconds": _percentile(waits, 0.99),
+                "avg_render_seconds": sum(runs) / len(runs) if runs else 0.0,
+                "p99_render_seconds": _percentile(runs, 0.99),
+            }
+        return stats
+
+
+render_scheduler = RenderScheduler()
@@ -0,0 +1,247 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+import importlib.util
+import multiprocessing as mp
+from render.scheduler import RenderScheduler, render_scheduler, RENDER_CONCURRENCY, PRIORITY_PREVIEW
+
+# One warm worker per render the scheduler admits at once
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(RENDER_CONCURRENCY)))
+RENDER_WORKER_MAX_JOBS = int(os.getenv("RENDER_WORKER_MAX_JOBS", "20"))
+RENDER_TIMEOUT = int(os.getenv("RENDER_TIMEOUT", "600"))
+WORKER_STARTUP_TIMEOUT = 120
+
+# Workers must not inherit the server's threads and sockets
+_ctx = mp.get_context("spawn")
+
+# ---------------- WORKER PROCESS ----------------
+
+def _worker_main(conn):
+    started = time.perf_counter()
+    import manim  # noqa: F401 - paid once per worker instead of once per render
+
+    conn.send({"import_seconds": time.perf_counter() - started})
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+
+        if task is None:
+            break
+
+        conn.send(_render_scene(**task))
+
+
+def _load_scene(script_path: str):
+    # Each script gets a private module that is never registered in sys.modules
+    spec = importlib.util.spec_from_file_location(f"generated_{uuid.uuid4().hex}", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.GeneratedScene
+
+
+def _render_scene(script_path: str, quality: str, output_dir: str, output_file: str, dry_run: bool = False) -> dict:
+    from manim import tempconfig
+
+    started = time.perf_counter()
+    timings = {}
+    stage = "dry_run_seconds" if dry_run else "render_seconds"
+
+    # Everything manim writes (partial movies, text SVGs, tex files) lands in output_dir
+    render_config = {
+        "quality": quality,
+        "input_file": script_path,
+        "media_dir": output_dir,
+        "video_dir": output_dir,
+        "output_file": output_file,
+        "disable_caching": True,
+        "preview": False,
+        "dry_run": dry_run,
+    }
+
+    try:
+        with tempconfig(render_config):
+            # A dry run executes construct() and every animation's end state without drawing frames
+            scene_class = _load_scene(script_path)
+            scene = scene_class(skip_animations=True) if dry_run else scene_class()
+            timings["setup_seconds"] = time.perf_counter() - started
+
+            scene.render()
+            timings[stage] = time.perf_counter() - started - timings["setup_seconds"]
+
+        return {"success": True, "timings": timings}
+    except Exception:
+        return {"success": False, "error": traceback.format_exc(), "timings": timings}
+
+# ---------------- POOL ----------------
+
+class _Worker:
+    def __init__(self):
+        self.conn, child = _ctx.Pipe()
+        self.process = _ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.spawned_at = time.perf_counter()
+        self.process.start()
+        child.close()
+
+        self.jobs = 0
+        self.startup_seconds = None
+
+    def wait_ready(self, timeout: float):
+        if self.startup_seconds is not None:
+            return
+
+        if not self.conn.poll(timeout):
+            raise TimeoutError("Render worker did not start in time")
+
+        self.conn.recv()
+        self.startup_seconds = time.perf_counter() - self.spawned_at
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class RenderWorkerPool:
+    def __init__(self, size: int = RENDER_WORKERS, max_jobs: int = RENDER_WORKER_MAX_JOBS,
+                 scheduler: RenderScheduler = render_scheduler):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.scheduler = scheduler
+        self._idle = []
+        self._available = threading.Condition()
+        self._lock = threading.Lock()
+        self._stats = {
+            "renders": 0,
+            "failures": 0,
+            "dry_runs": 0,
+            "dry_run_failures": 0,
+            "dry_run_seconds": 0.0,
+            "crashes": 0,
+            "recycled": 0,
+            "worker_startups": 0,
+            "worker_startup_seconds": 0.0,
+            "setup_seconds": 0.0,
+            "render_seconds": 0.0,
+        }
+
+        for _ in range(self.size):
+            self._idle.append(_Worker())
+
+    def _acquire(self) -> _Worker:
+        # The scheduler decides who runs next; this only hands out a warm process
+        with self._available:
+            while not self._idle:
+                self._available.wait()
+            return self._idle.pop()
+
+    def _release(self, worker: _Worker):
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def run(self, task: dict, timeout: float = RENDER_TIMEOUT, priority: int = PRIORITY_PREVIEW) -> dict:
+        with self.scheduler.slot(priority):
+            return self._run(task, timeout)
+
+    def _run(self, task: dict, timeout: float) -> dict:
+        worker = self._acquire()
+
+        try:
+            fresh = worker.startup_seconds is None
+            worker.wait_ready(WORKER_STARTUP_TIMEOUT)
+            if fresh:
+                self._record_startup(worker.startup_seconds)
+
+            worker.conn.send(task)
+            if not worker.conn.poll(timeout):
+                raise TimeoutError(f"Render exceeded {timeout}s")
+
+            result = worker.conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            worker.kill()
+            worker = _Worker()
+            self._record("crashes")
+            return {"success": False, "error": f"Render worker failed: {str(e) or type(e).__name__}", "timings": {}}
+        finally:
+            self._release(self._maybe_recycle(worker))
+
+        self._record_result(result, task.get("dry_run", False))
+        return result
+
+    def _maybe_recycle(self, worker: _Worker) -> _Worker:
+        if worker.startup_seconds is None:
+            return worker
+
+        worker.jobs += 1
+        if worker.jobs < self.max_jobs:
+            return worker
+
+        worker.stop()
+        self._record("recycled")
+        return _Worker()
+
+    def _record(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record_startup(self, seconds: float):
+        with self._lock:
+            self._stats["worker_startups"] += 1
+            self._stats["worker_startup_seconds"] += seconds
+
+    def _record_result(self, result: dict, dry_run: bool):
+        timings = result.get("timings", {})
+        with self._lock:
+            if dry_run:
+                self._stats["dry_runs"] += 1
+                if not result["success"]:
+                    self._stats["dry_run_failures"] += 1
+                self._stats["dry_run_seconds"] += timings.get("dry_run_seconds", 0.0)
+                return
+
+            self._stats["renders"] += 1
+            if not result["success"]:
+                self._stats["failures"] += 1
+            self._stats["setup_seconds"] += timings.get("setup_seconds", 0.0)
+            self._stats["render_seconds"] += timings.get("render_seconds", 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+
+        renders = stats["renders"] or 1
+        dry_runs = stats["dry_runs"] or 1
+        startups = stats["worker_startups"] or 1
+        return {
+            "workers": self.size,
+            "max_jobs_per_worker": self.max_jobs,
+            "renders": stats["renders"],
+            "failures": stats["failures"],
+            "crashes": stats["crashes"],
+            "recycled": stats["recycled"],
+            "avg_worker_startup_seconds": stats["worker_startup_seconds"] / startups,
+            "avg_setup_seconds": stats["setup_seconds"] / renders,
+            "avg_render_seconds": stats["render_seconds"] / renders,
+            "dry_runs": stats["dry_runs"],
+            "dry_run_failures": stats["dry_run_failures"],
+            "avg_dry_run_seconds": stats["dry_run_seconds"] / dry_runs,
+        }
+
+    def shutdown(self):
+        with self._available:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
@@ -1,21 +1,134 @@
+import glob
 import json
 import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "cache.db")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
 
-CACHE_DIR = "cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-def _cache_path(key: str) -> str:
-    return os.path.join(CACHE_DIR, f"{key}.json")
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+def _init_db(conn: sqlite3.Connection):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kv ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv (accessed_at)")
+    _import_legacy_files(conn)
+
+    # Running byte total so the size cap is enforced without scanning the table
+    conn.execute("CREATE TABLE IF NOT EXISTS kv_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.execute(
+        "INSERT OR IGNORE INTO kv_meta (name, value) "
+        "SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM kv"
+    )
+
+def _import_legacy_files(conn: sqlite3.Connection):
+    # One-time import of the old one-JSON-file-per-key layout
+    now = time.time()
+    for path in glob.glob(os.path.join(CACHE_DIR, "*.json")):
+        key = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.dumps(json.load(f), separators=(",", ":"))
+        except (OSError, ValueError):
+            continue
+
+        conn.execute(
+            "INSERT OR IGNORE INTO kv (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), now)
+        )
+        try:
+            os.replace(path, f"{path}.migrated")
+        except OSError:
+            pass
+
+def get_connection() -> sqlite3.Connection:
+    global _initialized
+
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with _init_lock:
+            if not _initialized:
+                _init_db(conn)
+                _initialized = True
+
+        _local.conn = conn
+    return conn
+
+def _add_bytes(conn: sqlite3.Connection, delta: int) -> int:
+    conn.execute("UPDATE kv_meta SET value = value + ? WHERE name = 'total_bytes'", (delta,))
+    return conn.execute("SELECT value FROM kv_meta WHERE name = 'total_bytes'").fetchone()[0]
+
+def _evict(conn: sqlite3.Connection, total: int):
+    if total <= CACHE_MAX_BYTES:
+        return
+
+    # Drop least recently used entries until the cache fits again
+    freed = 0
+    for key, size in conn.execute("SELECT key, size FROM kv ORDER BY accessed_at").fetchall():
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        freed += size
+        if total - freed <= CACHE_MAX_BYTES:
+            break
+
+    _add_bytes(conn, -freed)
 
 def get_cached_result(key: str):
-    path = _cache_path(key)
-    if not os.path.exists(path):
-        return None
+    return get_many([key]).get(key)
+
+def get_many(keys: list) -> dict:
+    if not keys:
+        return {}
+
+    conn = get_connection()
+    placeholders = ",".join("?" * len(keys))
+    rows = conn.execute(
+        f"SELECT key, value FROM kv WHERE key IN ({placeholders})", list(keys)
+    ).fetchall()
+
+    if rows:
+        conn.execute(
+            f"UPDATE kv SET accessed_at = ? WHERE key IN ({placeholders})",
+            [time.time(), *keys]
+        )
+
+    return {key: json.loads(value) for key, value in rows}
+
+def _size_of(conn: sqlite3.Connection, key: str) -> int:
+    row = conn.execute("SELECT size FROM kv WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+def save_cached_result(key: str, data):
+    value = json.dumps(data, separators=(",", ":"))
+    conn = get_connection()
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        previous = _size_of(conn, key)
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), time.time())
+        )
+        _evict(conn, _add_bytes(conn, len(value) - previous))
 
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def delete_cached_result(key: str):
+    conn = get_connection()
 
-def save_cached_result(key: str, data: dict):
-    path = _cache_path(key)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        previous = _size_of(conn, key)
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        _add_bytes(conn, -previous)
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+import time
+from storage.cache import get_connection, get_cached_result, delete_cached_result
+
+CHAT_COMPACT_EVERY = int(os.getenv("CHAT_COMPACT_EVERY", "500"))
+
+_lock = threading.Lock()
+_migrate_lock = threading.Lock()
+_table_ready = False
+_migrated = set()
+_appends_since_compaction = 0
+
+def _connect() -> sqlite3.Connection:
+    global _table_ready
+
+    conn = get_connection()
+    if not _table_ready:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_log ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+            "content TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        # Summaries replace the turns they fold, so they live beside the log, outside the evicting cache
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_summary ("
+            "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, "
+            "upto_seq INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        _table_ready = True
+    return conn
+
+def _migrate_legacy(conn: sqlite3.Connection, session_id: str):
+    # Histories written before the log existed live as one blob under chat_<session_id>
+    if session_id in _migrated:
+        return
+
+    with _migrate_lock:
+        if session_id in _migrated:
+            return
+
+        legacy = get_cached_result(f"chat_{session_id}")
+        if legacy:
+            _insert(conn, session_id, legacy)
+            delete_cached_result(f"chat_{session_id}")
+
+        _migrated.add(session_id)
+
+def _insert(conn: sqlite3.Connection, session_id: str, messages: list) -> int:
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        last = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM chat_log WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO chat_log (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (session_id, last + i, msg["role"], msg["content"], now)
+                for i, msg in enumerate(messages, start=1)
+            ]
+        )
+    return last + len(messages)
+
+def _maybe_compact(conn: sqlite3.Connection, appended: int):
+    # Fold the write-ahead log back into the database file every so often
+    global _appends_since_compaction
+
+    with _lock:
+        _appends_since_compaction += appended
+        if _appends_since_compaction < CHAT_COMPACT_EVERY:
+            return
+        _appends_since_compaction = 0
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def append_messages(session_id: str, messages: list) -> int:
+    if not messages:
+        return 0
+
+    conn = _connect()
+    _migrate_legacy(conn, session_id)
+    seq = _insert(conn, session_id, messages)
+    _maybe_compact(conn, len(messages))
+    return seq
+
+def append_message(session_id: str, role: str, content: str) -> int:
+    return append_messages(session_id, [{"role": role, "content": content}])
+
+def read_history(session_id: str, limit: int = None, before: int = None, after: int = None) -> list:
+    # Newest `limit` messages between `after` and `before`, returned oldest first
+    conn = _connect()
+    _migrate_legacy(conn, session_id)
+
+    query = "SELECT seq, role, content FROM chat_log WHERE session_id = ?"
+    params = [session_id]
+
+    if before is not None:
+        query += " AND seq < ?"
+        params.append(before)
+
+    if after is not None:
+        query += " AND seq > ?"
+        params.append(after)
+
+    query += " ORDER BY seq DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    rows = conn.execute(query, params).fetchall()
+    return [
+        {"seq": seq, "role": role, "content": content}
+        for seq, role, content in reversed(rows)
+    ]
+
+def read_summary(session_id: str) -> dict:
+    conn = _connect()
+    row = conn.execute(
+        "SELECT summary, upto_seq FROM chat_summary WHERE session_id = ?", (session_id,)
+    ).fetchone()
+    if row:
+        return {"summary": row[0], "upto_seq": row[1]}
+
+    # Summaries used to be kept in the result cache
+    legacy = get_cached_result(f"chat_summary_{session_id}")
+    if legacy:
+        save_summary(session_id, legacy["summary"], legacy["upto_seq"])
+        delete_cached_result(f"chat_summary_{session_id}")
+        return legacy
+
+    return {"summary": "", "upto_seq": 0}
+
+def save_summary(session_id: str, summary: str, upto_seq: int):
+    _connect().execute(
+        "INSERT OR REPLACE INTO chat_summary (session_id, summary, upto_seq, updated_at) VALUES (?, ?, ?, ?)",
+        (session_id, summary, upto_seq, time.time())
+    )
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from storage.chat_log import append_messages
+
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "0.2"))
+CHAT_BATCH_SIZE = int(os.getenv("CHAT_BATCH_SIZE", "200"))
+
+logger = logging.getLogger("ChatWriteBehind")
+
+
+def _write_batch(batch: list):
+    by_session = defaultdict(list)
+    for session_id, message in batch:
+        by_session[session_id].append(message)
+
+    for session_id, messages in by_session.items():
+        append_messages(session_id, messages)
+
+
+class ChatWriteBehind:
+    # Chat turns are queued on the event loop and persisted in batches off-loop
+    def __init__(self):
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.messages = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._drain())
+
+    def append(self, session_id: str, role: str, content: str):
+        self._queue.put_nowait((session_id, {"role": role, "content": content}))
+
+    async def flush(self):
+        await self._queue.join()
+
+    async def stop(self):
+        await self.flush()
+        self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "messages": self.messages,
+            "avg_batch_size": self.messages / self.batches if self.batches else 0.0,
+        }
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            # Give concurrent chats a moment to add to the same batch
+            await asyncio.sleep(CHAT_FLUSH_INTERVAL)
+            while len(batch) < CHAT_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(_write_batch, batch)
+                self.batches += 1
+                self.messages += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} chat messages: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,129 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from storage.cache import get_connection
+
+def materialize(source: str, target: str):
+    # Hard links cost nothing and survive the later content-addressing rename of either side;
+    # the temp name is unique per call, since threads saving the same key would otherwise share it
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+class FileLRU:
+    # Files in one directory, indexed in a SQLite table and evicted least recently used first
+    # once their total size passes max_bytes
+    def __init__(self, table: str, directory: str, max_bytes: int, suffix: str):
+        self.table = table
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._table_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = get_connection()
+        if not self._table_ready:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+            os.makedirs(self.directory, exist_ok=True)
+            self._table_ready = True
+        return conn
+
+    def _record(self, outcome: str, count: int = 1):
+        with self._stats_lock:
+            self._stats[outcome] += count
+
+    def path(self, key: str) -> str:
+        self._connect()
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute(f"SELECT path FROM {self.table} WHERE key = ?", (key,)).fetchone()
+
+        if row and not os.path.exists(row[0]):
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            row = None
+
+        if not row:
+            self._record("misses")
+            return None
+
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._record("hits")
+        return row[0]
+
+    def contains(self, key: str) -> bool:
+        row = self._connect().execute(f"SELECT path FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return bool(row) and os.path.exists(row[0])
+
+    def save(self, key: str, source: str = None):
+        # Without a source the file is already written at path(key); this only indexes it
+        conn = self._connect()
+        path = self.path(key)
+        if source is not None:
+            materialize(source, path)
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, path, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, path, os.path.getsize(path), time.time())
+            )
+            evicted = self._evict(conn)
+
+        for evicted_path in evicted:
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+
+        self._record("writes")
+        self._record("evictions", len(evicted))
+
+    def _evict(self, conn: sqlite3.Connection) -> list:
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return []
+
+        # Least recently used files go first; the newest entry is always kept
+        evicted = []
+        rows = conn.execute(f"SELECT key, path, size FROM {self.table} ORDER BY accessed_at").fetchall()
+        for key, path, size in rows[:-1]:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            evicted.append(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+        return evicted
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        entries, total = self._connect().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        return {
+            **stats,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hit_rate": stats.get("hits", 0) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,122 @@
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from storage.cache import get_connection
+
+LLM_MEMO_TTL = int(os.getenv("LLM_MEMO_TTL", str(7 * 24 * 3600)))
+LLM_MEMO_MAX_ENTRIES = int(os.getenv("LLM_MEMO_MAX_ENTRIES", "5000"))
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_table_ready = False
+
+
+class MemoScope:
+    # Memo entries one job read or wrote; a failed job takes them back, so retrying
+    # the prompt gets a fresh generation instead of replaying the same broken one
+    def __init__(self):
+        self.keys = set()
+        self.discarded = False
+        self._lock = threading.Lock()
+
+    def track(self, key: str) -> bool:
+        with self._lock:
+            if not self.discarded:
+                self.keys.add(key)
+            return not self.discarded
+
+    def discard(self):
+        with self._lock:
+            self.discarded = True
+            keys = list(self.keys)
+
+        if keys:
+            conn = _connect()
+            conn.executemany("DELETE FROM llm_memo WHERE key = ?", [(key,) for key in keys])
+            _record("job", "discards")
+
+# Copied into tasks and to_thread calls, so every stage of a job sees the same scope
+_scope = contextvars.ContextVar("llm_memo_scope", default=None)
+
+@contextmanager
+def memo_scope():
+    scope = MemoScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+def _track(key: str) -> bool:
+    scope = _scope.get()
+    return scope.track(key) if scope else True
+
+def _connect() -> sqlite3.Connection:
+    # Lives in the shared cache database, so every worker process sees the same memo
+    global _table_ready
+
+    conn = get_connection()
+    if not _table_ready:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_memo ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_memo_accessed ON llm_memo (accessed_at)")
+        _table_ready = True
+    return conn
+
+def _record(stage: str, outcome: str):
+    with _stats_lock:
+        _stats[f"{stage}_{outcome}"] += 1
+
+def memo_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+def memo_key(stage: str, version: int, prompt: str) -> str:
+    return hashlib.sha256(f"{stage}\0{version}\0{prompt}".encode()).hexdigest()
+
+def get_memo(stage: str, key: str):
+    conn = _connect()
+    row = conn.execute(
+        "SELECT response, created_at FROM llm_memo WHERE key = ?", (key,)
+    ).fetchone()
+
+    if row and time.time() - row[1] > LLM_MEMO_TTL:
+        conn.execute("DELETE FROM llm_memo WHERE key = ?", (key,))
+        row = None
+
+    if not row:
+        _record(stage, "misses")
+        return None
+
+    conn.execute("UPDATE llm_memo SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    _record(stage, "hits")
+    _track(key)
+    return row[0]
+
+def save_memo(key: str, response: str):
+    # A response that finishes streaming after its job already failed is not kept
+    if not _track(key):
+        return
+
+    conn = _connect()
+    now = time.time()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_memo (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, response, now, now)
+        )
+        # Evict the least recently used entries beyond the size bound
+        conn.execute(
+            "DELETE FROM llm_memo WHERE key IN ("
+            "SELECT key FROM llm_memo ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (LLM_MEMO_MAX_ENTRIES,)
+        )
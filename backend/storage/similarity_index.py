@@ -0,0 +1,138 @@
+import math
+import os
+import threading
+import zlib
+from collections import Counter, defaultdict
+from storage.cache import get_cached_result, save_cached_result
+from utils.prompt_normalizer import normalize_prompt
+
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+INDEX_KEY = "prompt_similarity_index"
+HASH_DIMENSIONS = 1 << 20
+STEM_LENGTH = 6
+STEM_WEIGHT = 3
+
+# Words that change the phrasing or framing of a request but not the topic
+FILLER_WORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "and", "with", "about",
+    "what", "is", "are", "how", "why", "does", "do", "me", "please", "can", "you",
+    "explain", "explanation", "show", "teach", "describe", "visualize", "visually", "animate",
+    "animation", "video", "lesson", "introduction", "intro", "understanding",
+    "proof", "prove", "intuition", "overview", "basics", "tutorial", "example",
+}
+
+def _bucket(token: str) -> int:
+    return zlib.crc32(token.encode()) % HASH_DIMENSIONS
+
+def _stem(word: str) -> str:
+    # Plurals share a stem, so sines / sine match but sine / cosine do not
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word[:STEM_LENGTH]
+
+# Compared after stemming, so inflected fillers such as "explained" or "proofs" drop out too
+FILLER_STEMS = {_stem(word) for word in FILLER_WORDS}
+
+def _words(prompt: str) -> list:
+    return [w for w in normalize_prompt(prompt).split() if _stem(w) not in FILLER_STEMS]
+
+def _stems(prompt: str) -> frozenset:
+    return frozenset(_stem(w) for w in _words(prompt))
+
+def _features(prompt: str) -> Counter:
+    words = _words(prompt)
+    features = Counter()
+
+    # Character trigrams tolerate spelling variants such as pythagoras / pythagorean
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[_bucket(padded[i:i + 3])] += 1
+
+    # Word stems carry most of the weight so that e.g. sines / cosines stay apart
+    for word in words:
+        features[_bucket(f"w:{_stem(word)}")] += STEM_WEIGHT
+
+    return features
+
+
+class SimilarityIndex:
+    # An inverted index from stems to entries picks the candidates; cosine similarity decides
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries = []
+        self._postings = defaultdict(list)
+        self._keys = set()
+        self._df = Counter()
+
+        for entry in get_cached_result(INDEX_KEY) or []:
+            self._insert(entry["prompt"], entry["cache_key"])
+
+    def _insert(self, prompt: str, cache_key: str):
+        features = _features(prompt)
+        stems = _stems(prompt)
+        for stem in stems:
+            self._postings[stem].append(len(self._entries))
+        self._entries.append((prompt, cache_key, features, stems))
+        self._keys.add(cache_key)
+        self._df.update(features.keys())
+
+    def _weights(self, features: Counter) -> dict:
+        total = len(self._entries)
+        weights = {
+            bucket: count * (math.log((1 + total) / (1 + self._df[bucket])) + 1)
+            for bucket, count in features.items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {bucket: w / norm for bucket, w in weights.items()}
+
+    def add(self, prompt: str, cache_key: str):
+        with self._lock:
+            if cache_key in self._keys:
+                return
+
+            self._insert(prompt, cache_key)
+            save_cached_result(
+                INDEX_KEY,
+                [{"prompt": p, "cache_key": k} for p, k, _, _ in self._entries]
+            )
+
+    def query(self, prompt: str, threshold: float = None):
+        threshold = self.threshold if threshold is None else threshold
+        query_features = _features(prompt)
+        if not query_features:
+            return None
+
+        stems = _stems(prompt)
+        with self._lock:
+            candidates = self._candidates(stems)
+            if not candidates:
+                return None
+
+            query = self._weights(query_features)
+            best = None
+
+            for _, cache_key, features, _ in candidates:
+                weights = self._weights(features)
+                score = sum(w * weights.get(bucket, 0.0) for bucket, w in query.items())
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (cache_key, score)
+
+        return best
+
+    def _candidates(self, stems: frozenset) -> list:
+        # Every topic stem of the shorter prompt must appear in the longer one, so "sine wave" is
+        # scored against "sine wave frequency" but "derivative of sin x" never meets
+        # "derivative of x squared"; the threshold then decides
+        shared = Counter()
+        for stem in stems:
+            shared.update(self._postings.get(stem, ()))
+
+        return [
+            self._entries[i] for i, count in shared.items()
+            if count == len(stems) or count == len(self._entries[i][3])
+        ]
+
+
+prompt_index = SimilarityIndex()
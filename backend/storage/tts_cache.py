@@ -0,0 +1,26 @@
+import hashlib
+import os
+from storage.file_lru import FileLRU
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join("media", "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_cache = FileLRU("tts_segments", TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, ".mp3")
+
+def segment_key(voice_id: str, model_id: str, text: str) -> str:
+    # Whitespace differences do not change the spoken sentence
+    spoken = " ".join(text.split())
+    return hashlib.sha256(f"{voice_id}\0{model_id}\0{spoken}".encode()).hexdigest()
+
+def segment_path(key: str) -> str:
+    return _cache.path(key)
+
+def get_segment(key: str):
+    return _cache.get(key)
+
+def save_segment(key: str):
+    # The audio is already written at segment_path(key); this only indexes it
+    _cache.save(key)
+
+def tts_cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend modules directly and must never touch the real cache database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="animathics_test_"))
@@ -0,0 +1,41 @@
+import os
+from storage.file_lru import FileLRU, materialize
+
+
+def write(path: str, size: int) -> str:
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_least_recently_used_file_is_evicted(tmp_path):
+    cache = FileLRU("test_lru_evict", str(tmp_path / "cache"), 250, ".bin")
+    for key in ("a", "b"):
+        cache.save(key, write(str(tmp_path / key), 100))
+
+    cache.get("a")
+    cache.save("c", write(str(tmp_path / "c"), 100))
+
+    assert cache.contains("a") and cache.contains("c")
+    assert not cache.contains("b")
+    assert not os.path.exists(cache.path("b"))
+    assert cache.stats()["evictions"] == 1
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = FileLRU("test_lru_missing", str(tmp_path / "cache"), 1000, ".bin")
+    cache.save("a", write(str(tmp_path / "a"), 10))
+    os.remove(cache.path("a"))
+
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_materialize_replaces_the_target(tmp_path):
+    source = write(str(tmp_path / "source"), 10)
+    target = write(str(tmp_path / "target"), 3)
+
+    materialize(source, target)
+
+    assert os.path.getsize(target) == 10
+    assert sorted(os.listdir(tmp_path)) == ["source", "target"]
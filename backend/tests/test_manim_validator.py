@@ -0,0 +1,34 @@
+import pytest
+from utils.manim_validator import validate_manim_code
+
+HEADER = "from manim import *\n\nclass GeneratedScene(Scene):\n    def construct(self):\n"
+
+
+def scene(*lines) -> str:
+    return HEADER + "".join(f"        {line}\n" for line in lines)
+
+
+@pytest.mark.parametrize("code", [
+    scene("ax = Axes()", "self.add(ax, ax.get_axis_labels())"),
+    scene("ax = Axes()", "self.add(ax.get_axis_labels(x_label='x', y_label=Text('y')))"),
+    scene("ax = Axes()", "ax.add_coordinates()"),
+    scene("line = NumberLine(include_numbers=True)"),
+    scene("ax = Axes(axis_config={'include_numbers': True})"),
+    scene("ax = Axes()", "graph = ax.plot(lambda x: x ** 2)", "self.add(ax.get_graph_label(graph))"),
+])
+def test_latex_through_methods_and_kwargs_is_rejected(code):
+    assert any("LaTeX" in issue.message for issue in validate_manim_code(code))
+
+
+@pytest.mark.parametrize("code", [
+    scene("ax = Axes()", "self.add(ax.get_axis_labels(Text('x'), Text('y')))"),
+    scene("line = NumberLine(include_numbers=False)"),
+    scene("ax = Axes()", "graph = ax.plot(lambda x: x ** 2)", "self.add(ax.get_graph_label(graph, Text('f')))"),
+])
+def test_text_labels_pass(code):
+    assert validate_manim_code(code) == []
+
+
+def test_symbols_cover_default_constants():
+    code = scene("self.play(Create(Circle(color=BLUE)), run_time=DEFAULT_ANIMATION_RUN_TIME)")
+    assert validate_manim_code(code) == []
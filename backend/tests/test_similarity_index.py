@@ -0,0 +1,49 @@
+import pytest
+from storage.similarity_index import SimilarityIndex, SIMILARITY_THRESHOLD
+
+INDEXED = [
+    "Pythagorean theorem",
+    "derivative of x squared",
+    "binary search",
+    "bayes theorem",
+    "sine waves",
+]
+
+
+@pytest.fixture
+def index():
+    index = SimilarityIndex()
+    for i, prompt in enumerate(INDEXED):
+        index._insert(prompt, f"key{i}")
+    return index
+
+
+@pytest.mark.parametrize("prompt", [
+    "Pythagorean theorem",
+    "pythagoras theorem proof",
+    "explain the pythagorean theorem",
+    "pythagorean theorem explained",
+])
+def test_rephrasings_reuse_the_video(index, prompt):
+    match = index.query(prompt)
+    assert match and match[0] == "key0"
+
+
+@pytest.mark.parametrize("prompt", [
+    "derivative of sin x",
+    "binary search tree",
+    "theorem",
+    "cosine waves",
+])
+def test_other_topics_miss(index, prompt):
+    assert index.query(prompt) is None
+
+
+def test_threshold_decides_between_candidates(index):
+    # "binary search tree" shares every stem of "binary search"; only the score keeps them apart
+    assert index.query("binary search tree", threshold=0.0)[0] == "key2"
+    assert index.query("binary search tree", threshold=SIMILARITY_THRESHOLD) is None
+
+
+def test_disjoint_stems_never_match(index):
+    assert index.query("derivative of sin x", threshold=0.0) is None
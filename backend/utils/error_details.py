@@ -0,0 +1,103 @@
+import os
+import re
+
+MAX_SCRIPT_FRAMES = 8
+MAX_MESSAGE_CHARS = 600
+
+_FRAME_RE = re.compile(r'^\s*File "(?P<file>.+)", line (?P<line>\d+), in (?P<func>.+)$')
+_ISSUE_RE = re.compile(r"^line (?P<line>\d+), col (?P<col>\d+): (?P<message>.+)$")
+_EXCEPTION_RE = re.compile(r"^(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt|Warning))(?::\s*(?P<message>.*))?$")
+
+def _last_section(traceback_text: str) -> list:
+    # Chained exceptions print several tracebacks; the last one is what actually failed
+    lines = traceback_text.strip().splitlines()
+    starts = [i for i, line in enumerate(lines) if line.startswith("Traceback (most recent call last)")]
+    return lines[starts[-1]:] if starts else lines
+
+def _frames(lines: list) -> list:
+    frames = []
+    for i, line in enumerate(lines):
+        match = _FRAME_RE.match(line)
+        if not match:
+            continue
+
+        source = lines[i + 1].strip() if i + 1 < len(lines) and not _FRAME_RE.match(lines[i + 1]) else ""
+        frames.append({
+            "file": match["file"],
+            "line": int(match["line"]),
+            "function": match["func"],
+            "source": source,
+        })
+    return frames
+
+def _exception(lines: list) -> tuple:
+    for line in reversed(lines):
+        match = _EXCEPTION_RE.match(line.strip())
+        if match:
+            return match["type"].split(".")[-1], (match["message"] or "")[:MAX_MESSAGE_CHARS]
+
+    last = lines[-1].strip() if lines else ""
+    return "Error", last[:MAX_MESSAGE_CHARS]
+
+def _offending_lines(line_numbers: list, code: str) -> list:
+    code_lines = (code or "").splitlines()
+    offending = []
+    for number in dict.fromkeys(line_numbers):
+        if 0 < number <= len(code_lines):
+            offending.append({"line": number, "code": code_lines[number - 1].rstrip()})
+    return offending
+
+def _from_issues(stage: str, report: str, code: str) -> dict:
+    # The static validator reports one "line N, col M: message" entry per problem
+    issues = [match.groupdict() for match in map(_ISSUE_RE.match, report.splitlines()) if match]
+    exception_type = "SyntaxError" if issues and issues[0]["message"].startswith("SyntaxError") else "ValidationError"
+
+    return {
+        "stage": stage,
+        "exception_type": exception_type,
+        "message": "; ".join(issue["message"] for issue in issues)[:MAX_MESSAGE_CHARS],
+        "traceback": report,
+        "offending_lines": _offending_lines([int(issue["line"]) for issue in issues], code),
+    }
+
+def build_error_details(stage: str, error: str, script_path: str = None, code: str = None) -> dict:
+    error = error or ""
+    if _ISSUE_RE.match(error.splitlines()[0] if error else ""):
+        return _from_issues(stage, error, code)
+
+    lines = _last_section(error)
+    frames = _frames(lines)
+    exception_type, message = _exception(lines)
+
+    script_name = os.path.basename(script_path) if script_path else None
+    script_frames = [f for f in frames if script_name and os.path.basename(f["file"]) == script_name]
+
+    # Manim internals rarely help the fixer; keep the generated script's frames, or the innermost few
+    kept = script_frames[-MAX_SCRIPT_FRAMES:] or frames[-3:]
+    trimmed = ["Traceback (most recent call last):"] if kept else []
+    for frame in kept:
+        trimmed.append(f'  File "{os.path.basename(frame["file"])}", line {frame["line"]}, in {frame["function"]}')
+        if frame["source"]:
+            trimmed.append(f"    {frame['source']}")
+    trimmed.append(f"{exception_type}: {message}" if message else exception_type)
+
+    return {
+        "stage": stage,
+        "exception_type": exception_type,
+        "message": message,
+        "traceback": "\n".join(trimmed),
+        "offending_lines": _offending_lines([f["line"] for f in script_frames], code),
+    }
+
+def format_error_details(details: dict) -> str:
+    report = [
+        f"Stage: {details['stage']}",
+        f"Exception: {details['exception_type']}: {details['message']}",
+    ]
+
+    if details.get("offending_lines"):
+        report.append("Offending lines:")
+        report.extend(f"  {item['line']} | {item['code']}" for item in details["offending_lines"])
+
+    report.append(details["traceback"])
+    return "\n".join(report)
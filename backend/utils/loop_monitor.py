@@ -0,0 +1,35 @@
+import asyncio
+import time
+from collections import deque
+
+class LoopLagMonitor:
+    # Measures how late a periodic timer fires; any delay is time the loop spent blocked
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0}
+
+        return {
+            "samples": len(samples),
+            "avg_lag_ms": sum(samples) / len(samples) * 1000,
+            "p99_lag_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+            "max_lag_ms": samples[-1] * 1000,
+        }
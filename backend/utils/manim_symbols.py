@@ -0,0 +1,106 @@
+# Names that `from manim import *` provides in Manim Community Edition (v0.18/v0.19)
+# and that generated scenes are allowed to use. When manim is installed the set is read
+# from the package itself; the literal lists below are only the fallback without it.
+
+_COLOR_BASES = ["BLUE", "TEAL", "GREEN", "YELLOW", "GOLD", "RED", "MAROON", "PURPLE", "GRAY", "GREY"]
+
+COLORS = {
+    "WHITE", "BLACK", "GRAY", "GREY", "LIGHT_GRAY", "LIGHT_GREY", "DARK_GRAY", "DARK_GREY",
+    "LIGHTER_GRAY", "LIGHTER_GREY", "DARKER_GRAY", "DARKER_GREY", "GRAY_BROWN", "GREY_BROWN",
+    "BLUE", "TEAL", "GREEN", "YELLOW", "GOLD", "RED", "MAROON", "PURPLE", "PINK", "LIGHT_PINK",
+    "ORANGE", "LIGHT_BROWN", "DARK_BROWN", "DARK_BLUE", "PURE_RED", "PURE_GREEN", "PURE_BLUE",
+    "LOGO_WHITE", "LOGO_GREEN", "LOGO_BLUE", "LOGO_RED", "LOGO_BLACK",
+    *(f"{base}_{shade}" for base in _COLOR_BASES for shade in "ABCDE"),
+    "ManimColor", "color_gradient", "interpolate_color", "invert_color", "average_color",
+    "random_color", "random_bright_color", "rgb_to_color", "hex_to_rgb", "rgb_to_hex", "color_to_rgb",
+}
+
+CONSTANTS = {
+    "ORIGIN", "UP", "DOWN", "LEFT", "RIGHT", "IN", "OUT", "UL", "UR", "DL", "DR",
+    "X_AXIS", "Y_AXIS", "Z_AXIS", "PI", "TAU", "DEGREES", "RADIANS",
+    "SMALL_BUFF", "MED_SMALL_BUFF", "MED_LARGE_BUFF", "LARGE_BUFF",
+    "DEFAULT_MOBJECT_TO_EDGE_BUFFER", "DEFAULT_MOBJECT_TO_MOBJECT_BUFFER",
+    "DEFAULT_FONT_SIZE", "DEFAULT_STROKE_WIDTH", "DEFAULT_DOT_RADIUS", "DEFAULT_SMALL_DOT_RADIUS",
+    "DEFAULT_ARROW_TIP_LENGTH", "DEFAULT_ANIMATION_RUN_TIME", "DEFAULT_WAIT_TIME", "START_X", "START_Y",
+    "NORMAL", "ITALIC", "OBLIQUE", "BOLD", "THIN", "LIGHT", "BOOK", "MEDIUM", "SEMIBOLD", "ULTRABOLD", "HEAVY",
+    "config", "np",
+}
+
+SCENES = {
+    "Scene", "ThreeDScene", "MovingCameraScene", "ZoomedScene", "VectorScene",
+    "LinearTransformationScene", "SpecialThreeDScene",
+}
+
+MOBJECTS = {
+    "Mobject", "VMobject", "Group", "VGroup", "VDict", "PMobject", "Mobject1D", "PointCloudDot",
+    "Point", "Dot", "Dot3D", "SmallDot", "AnnotationDot", "LabeledDot",
+    "Circle", "Ellipse", "Annulus", "AnnularSector", "Sector", "Arc", "ArcBetweenPoints",
+    "CurvedArrow", "CurvedDoubleArrow", "TipableVMobject", "ArrowTip", "ArrowTriangleTip",
+    "ArrowTriangleFilledTip", "ArrowCircleTip", "ArrowCircleFilledTip", "ArrowSquareTip",
+    "ArrowSquareFilledTip", "StealthTip",
+    "Square", "Rectangle", "RoundedRectangle", "Triangle", "Polygon", "RegularPolygon",
+    "Polygram", "RegularPolygram", "Star", "Cutout", "CubicBezier",
+    "Line", "DashedLine", "TangentLine", "Elbow", "Arrow", "DoubleArrow", "Vector",
+    "Angle", "RightAngle", "Cross", "LabeledLine", "LabeledArrow",
+    "Union", "Intersection", "Difference", "Exclusion",
+    "Brace", "BraceBetweenPoints", "ArcBrace",
+    "Text", "Paragraph", "MarkupText", "Code",
+    "Table", "MobjectTable",
+    "NumberLine", "UnitInterval", "Axes", "ThreeDAxes", "NumberPlane", "ComplexPlane",
+    "PolarPlane", "CoordinateSystem", "ParametricFunction", "FunctionGraph", "ImplicitFunction",
+    "BarChart", "SampleSpace", "Graph", "DiGraph",
+    "SurroundingRectangle", "BackgroundRectangle", "ScreenRectangle", "FullScreenRectangle", "Underline",
+    "ImageMobject", "SVGMobject", "DashedVMobject", "TracedPath",
+    "ValueTracker", "ComplexValueTracker",
+    "VectorField", "ArrowVectorField", "StreamLines",
+    "Sphere", "Cube", "Prism", "Cone", "Cylinder", "Torus", "Surface", "Arrow3D", "Line3D",
+    "Polyhedron", "Tetrahedron", "Octahedron", "Icosahedron", "Dodecahedron",
+    "always_redraw",
+}
+
+ANIMATIONS = {
+    "Animation", "Wait", "Add", "Create", "Uncreate", "Write", "Unwrite", "DrawBorderThenFill",
+    "ShowIncreasingSubsets", "ShowSubmobjectsOneByOne", "AddTextLetterByLetter",
+    "RemoveTextLetterByLetter", "AddTextWordByWord", "TypeWithCursor", "UntypeWithCursor", "SpiralIn",
+    "FadeIn", "FadeOut", "FadeTransform", "FadeTransformPieces",
+    "GrowFromCenter", "GrowFromEdge", "GrowFromPoint", "GrowArrow", "SpinInFromNothing",
+    "Transform", "ReplacementTransform", "TransformFromCopy", "ClockwiseTransform",
+    "CounterclockwiseTransform", "MoveToTarget", "ApplyMethod", "ApplyFunction", "ApplyMatrix",
+    "ApplyPointwiseFunction", "ApplyComplexFunction", "Restore", "ScaleInPlace", "ShrinkToCenter",
+    "FadeToColor", "CyclicReplace", "Swap", "TransformMatchingShapes", "TransformAnimations",
+    "Indicate", "Flash", "Circumscribe", "Wiggle", "FocusOn", "ShowPassingFlash",
+    "ShowPassingFlashWithThinningStrokeWidth", "ApplyWave", "Blink", "Broadcast",
+    "Rotate", "Rotating", "MoveAlongPath", "Homotopy", "SmoothedVectorizedHomotopy",
+    "ComplexHomotopy", "PhaseFlow", "UpdateFromFunc", "UpdateFromAlphaFunc",
+    "MaintainPositionRelativeTo", "ChangeDecimalToValue", "ChangingDecimal",
+    "AnimationGroup", "Succession", "LaggedStart", "LaggedStartMap",
+}
+
+RATE_FUNCTIONS = {
+    "rate_functions", "linear", "smooth", "smoothstep", "smootherstep", "smoothererstep",
+    "rush_into", "rush_from", "slow_into", "double_smooth", "there_and_back",
+    "there_and_back_with_pause", "running_start", "not_quite_there", "wiggle", "squish_rate_func",
+    "lingering", "exponential_decay",
+    *(f"ease_{kind}_{curve}" for kind in ("in", "out", "in_out")
+      for curve in ("sine", "quad", "cubic", "quart", "quint", "expo", "circ", "back", "elastic", "bounce")),
+}
+
+UTILITIES = {
+    "interpolate", "inverse_interpolate", "rotate_vector", "rotation_matrix", "normalize",
+    "angle_of_vector", "angle_between_vectors", "get_unit_normal", "line_intersection",
+    "midpoint", "center_of_mass", "cartesian_to_spherical", "spherical_to_cartesian",
+    "bezier", "choose", "sigmoid", "tempconfig", "index_labels",
+}
+
+try:
+    import manim
+except ImportError:
+    manim = None
+
+if manim is not None:
+    # manim has no __all__, so the star import brings in every public name
+    MANIM_SYMBOLS = frozenset(name for name in dir(manim) if not name.startswith("_"))
+else:
+    MANIM_SYMBOLS = frozenset(
+        COLORS | CONSTANTS | SCENES | MOBJECTS | ANIMATIONS | RATE_FUNCTIONS | UTILITIES
+    )
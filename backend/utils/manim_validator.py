@@ -0,0 +1,238 @@
+import ast
+import builtins
+from dataclasses import dataclass
+from utils.manim_symbols import MANIM_SYMBOLS
+
+ALLOWED_MODULES = {
+    "manim", "numpy", "math", "random", "itertools", "functools", "collections", "typing", "colour",
+}
+
+FORBIDDEN_MODULES = {
+    "manimlib": "ManimGL imports are not supported; use `from manim import *`",
+    "manimgl": "ManimGL imports are not supported; use `from manim import *`",
+}
+
+FORBIDDEN_NAMES = {
+    "MathTex": "MathTex requires LaTeX, which is not available; use Text",
+    "Tex": "Tex requires LaTeX, which is not available; use Text",
+    "SingleStringMathTex": "SingleStringMathTex requires LaTeX, which is not available; use Text",
+    # Built on Tex/MathTex, so they fail at render time just like it
+    "Title": "Title renders through Tex, which requires LaTeX; use Text(...).to_edge(UP)",
+    "BulletedList": "BulletedList renders through Tex, which requires LaTeX; use a VGroup of Text arranged DOWN",
+    "DecimalNumber": "DecimalNumber renders through MathTex, which requires LaTeX; use Text(f\"{value:.2f}\")",
+    "Integer": "Integer renders through MathTex, which requires LaTeX; use Text(str(value))",
+    "Variable": "Variable renders through MathTex, which requires LaTeX; use Text with a ValueTracker",
+    "Matrix": "Matrix renders through MathTex, which requires LaTeX; use Table or a grid of Text",
+    "IntegerMatrix": "IntegerMatrix renders through MathTex, which requires LaTeX; use Table or a grid of Text",
+    "DecimalMatrix": "DecimalMatrix renders through MathTex, which requires LaTeX; use Table or a grid of Text",
+    "MobjectMatrix": "MobjectMatrix draws its brackets with MathTex, which requires LaTeX; use MobjectTable",
+    "MathTable": "MathTable renders through MathTex, which requires LaTeX; use Table",
+    "IntegerTable": "IntegerTable renders through MathTex, which requires LaTeX; use Table",
+    "DecimalTable": "DecimalTable renders through MathTex, which requires LaTeX; use Table",
+    "BraceLabel": "BraceLabel renders through MathTex, which requires LaTeX; use Brace with Text next to it",
+    "BraceText": "BraceText renders through Tex, which requires LaTeX; use Brace with Text next to it",
+    "TexMobject": "TexMobject is from older Manim versions; use Text",
+    "TextMobject": "TextMobject is from older Manim versions; use Text",
+    "ShowCreation": "ShowCreation is from older Manim versions; use Create",
+    "GraphScene": "GraphScene was removed from Manim CE; use Scene with Axes",
+    "CONFIG": "CONFIG dictionaries are ManimGL syntax; pass arguments to the constructor",
+}
+
+# Methods that build their labels with MathTex/Tex unless given a mobject
+LATEX_METHODS = {
+    "add_coordinates": "add_coordinates() labels the ticks with MathTex, which requires LaTeX; place Text labels with number_to_point/c2p",
+    "add_numbers": "add_numbers() labels the ticks with MathTex, which requires LaTeX; place Text labels with number_to_point",
+}
+
+# Label methods: which positional index / keyword holds each label, and whether it is required
+LATEX_LABEL_ARGS = {
+    "get_axis_labels": ((0, "x_label", False), (1, "y_label", False)),
+    "get_x_axis_label": ((0, "label", True),),
+    "get_y_axis_label": ((0, "label", True),),
+    "get_graph_label": ((1, "label", False),),
+}
+
+# Keyword arguments (or axis_config keys) that make a mobject draw MathTex numbers
+LATEX_KWARGS = {"include_numbers", "numbers_to_include", "numbers_with_elongated_ticks"}
+
+SCENE_CLASS = "GeneratedScene"
+
+_BUILTINS = set(dir(builtins))
+
+
+@dataclass
+class ValidationIssue:
+    line: int
+    col: int
+    message: str
+
+
+def _issue(node: ast.AST, message: str) -> ValidationIssue:
+    return ValidationIssue(getattr(node, "lineno", 1), getattr(node, "col_offset", 0) + 1, message)
+
+def _is_self_mobjects(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Attribute)
+        and node.attr == "mobjects"
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "self"
+    )
+
+def _is_string(node: ast.AST) -> bool:
+    return isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, str))
+
+def _latex_label(call: ast.Call) -> bool:
+    # A missing label falls back to a string default, and strings go through MathTex
+    keywords = {keyword.arg: keyword.value for keyword in call.keywords if keyword.arg}
+    for index, name, required in LATEX_LABEL_ARGS[call.func.attr]:
+        if name in keywords:
+            label = keywords[name]
+        elif index < len(call.args):
+            label = call.args[index]
+        elif required:
+            continue
+        else:
+            return True
+        if _is_string(label):
+            return True
+    return False
+
+def _enables_latex(key: str, value: ast.AST) -> bool:
+    if key not in LATEX_KWARGS:
+        return False
+    # include_numbers=False is fine; any list of numbers_to_include is not
+    return not (isinstance(value, ast.Constant) and value.value in (False, None))
+
+def _check_imports(tree: ast.Module, issues: list) -> bool:
+    star_manim = False
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""]
+            # A star import from ManimGL is already reported; don't bury that under unknown names
+            root = (node.module or "").split(".")[0]
+            if root in {"manim", *FORBIDDEN_MODULES} and any(alias.name == "*" for alias in node.names):
+                star_manim = True
+        else:
+            continue
+
+        for module in modules:
+            root = module.split(".")[0]
+            if root in FORBIDDEN_MODULES:
+                issues.append(_issue(node, FORBIDDEN_MODULES[root]))
+            elif root not in ALLOWED_MODULES:
+                issues.append(_issue(node, f"Import of '{module}' is not allowed in generated scenes"))
+
+    return star_manim
+
+def _check_patterns(tree: ast.Module, issues: list):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in FORBIDDEN_NAMES:
+            issues.append(_issue(node, FORBIDDEN_NAMES[node.id]))
+
+        elif isinstance(node, ast.Attribute) and node.attr == "animate" and _is_self_mobjects(node.value):
+            issues.append(_issue(node, "self.mobjects is a list and has no .animate; wrap it in Group(*self.mobjects)"))
+
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr == "get_corner" and not node.args and not node.keywords:
+                issues.append(_issue(node, ".get_corner() needs a direction, e.g. .get_corner(UP + RIGHT)"))
+            elif node.func.attr in LATEX_METHODS:
+                issues.append(_issue(node, LATEX_METHODS[node.func.attr]))
+            elif node.func.attr in LATEX_LABEL_ARGS and _latex_label(node):
+                issues.append(_issue(
+                    node, f".{node.func.attr}() turns string labels into MathTex, which requires LaTeX; pass Text(...) labels"
+                ))
+
+        if isinstance(node, ast.Call):
+            for keyword in node.keywords:
+                if keyword.arg and _enables_latex(keyword.arg, keyword.value):
+                    issues.append(_issue(keyword.value, f"{keyword.arg} draws the numbers with MathTex, which requires LaTeX; add Text labels instead"))
+
+        elif isinstance(node, ast.Dict):
+            # axis_config={"include_numbers": True} and friends
+            for key, value in zip(node.keys, node.values):
+                if isinstance(key, ast.Constant) and isinstance(key.value, str) and _enables_latex(key.value, value):
+                    issues.append(_issue(value, f"{key.value} draws the numbers with MathTex, which requires LaTeX; add Text labels instead"))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "VGroup":
+            if any(isinstance(arg, ast.Starred) and _is_self_mobjects(arg.value) for arg in node.args):
+                issues.append(_issue(node, "VGroup(*self.mobjects) fails on non-vector mobjects; use Group(*self.mobjects)"))
+
+def _check_scene(tree: ast.Module, issues: list):
+    scene = next(
+        (node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == SCENE_CLASS),
+        None
+    )
+    if scene is None:
+        issues.append(ValidationIssue(1, 1, f"No top-level class {SCENE_CLASS} found"))
+        return
+
+    if not scene.bases:
+        issues.append(_issue(scene, f"{SCENE_CLASS} must subclass a Manim Scene"))
+
+    if not any(isinstance(node, ast.FunctionDef) and node.name == "construct" for node in scene.body):
+        issues.append(_issue(scene, f"{SCENE_CLASS} must define construct(self)"))
+
+def _bound_names(tree: ast.Module) -> set:
+    # Scope-insensitive on purpose: a name bound anywhere counts, so only truly unknown names are flagged
+    bound = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    bound.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+
+    return bound
+
+def _check_names(tree: ast.Module, star_manim: bool, issues: list):
+    known = _bound_names(tree) | _BUILTINS
+    if star_manim:
+        known |= MANIM_SYMBOLS
+
+    reported = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Name) or not isinstance(node.ctx, ast.Load):
+            continue
+        if node.id in known or node.id in reported or node.id in FORBIDDEN_NAMES:
+            continue
+
+        reported.add(node.id)
+        issues.append(_issue(node, f"Unknown name '{node.id}' (not defined and not a Manim CE symbol)"))
+
+def validate_manim_code(code: str) -> list:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [ValidationIssue(e.lineno or 1, e.offset or 1, f"SyntaxError: {e.msg}")]
+
+    issues = []
+    star_manim = _check_imports(tree, issues)
+    _check_patterns(tree, issues)
+    _check_scene(tree, issues)
+    _check_names(tree, star_manim, issues)
+
+    return sorted(issues, key=lambda issue: (issue.line, issue.col))
+
+def format_issues(issues: list, code: str) -> str:
+    lines = code.splitlines()
+    report = []
+
+    for issue in issues:
+        report.append(f"line {issue.line}, col {issue.col}: {issue.message}")
+        if 0 < issue.line <= len(lines):
+            report.append(f"    {issue.line} | {lines[issue.line - 1].rstrip()}")
+
+    return "\n".join(report)
@@ -0,0 +1,10 @@
+import re
+import hashlib
+
+def normalize_prompt(prompt: str) -> str:
+    text = prompt.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def prompt_cache_key(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
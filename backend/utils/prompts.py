@@ -1,3 +1,10 @@
+# Bump a stage's version whenever its template changes so memoized responses are not reused
+PROMPT_VERSIONS = {
+    "gemini": 1,
+    "align": 1,
+    "fix": 1,
+}
+
 def build_gemini_prompt(topic: str) -> str:
     return f"""You are an EXPERT MANIM COMMUNITY ANIMATOR. Generate ZERO-ERROR animations using ONLY verified Manim Community Edition syntax. Every line must execute perfectly without compilation errors.
 
@@ -462,3 +469,25 @@ Instructions:
 7. End with a final wait (self.wait(1) or greater).
 8. Do not attempt to run manim or reference local file paths.
 """
+
+def build_chat_summary_prompt(previous_summary: str, messages: list) -> str:
+    transcript = "\n".join(
+        f"{'Student' if msg['role'] == 'user' else 'Tutor'}: {msg['content']}" for msg in messages
+    )
+    return f"""
+You are maintaining the running memory of a math tutoring session.
+
+--- CURRENT SUMMARY START ---
+{previous_summary or "NO_SUMMARY_YET"}
+--- CURRENT SUMMARY END ---
+
+--- NEW CONVERSATION START ---
+{transcript}
+--- NEW CONVERSATION END ---
+
+Instructions:
+1. Return ONLY the updated summary as plain text. No headings, no markdown.
+2. Merge the new conversation into the current summary; do not drop earlier facts.
+3. Keep topics covered, definitions and results the student was given, the student's misconceptions, and any open questions.
+4. Keep it under 250 words.
+"""
@@ -0,0 +1,37 @@
+CODE_MARKER = "===MANIM_CODE==="
+AUDIO_MARKER = "===AUDIO_SCRIPT==="
+
+class SectionStream:
+    # Incremental form of the ===MANIM_CODE=== / ===AUDIO_SCRIPT=== split in GeminiManimAgent;
+    # a marker may arrive split across chunks, so each search re-covers the previous tail
+    def __init__(self):
+        self.text = ""
+        self.code = None
+        self._scan = 0
+        self._audio_start = None
+
+    def feed(self, chunk: str) -> bool:
+        # True once the code section has closed
+        self.text += chunk
+        if self.code is not None:
+            return True
+
+        start = self.text.find(CODE_MARKER)
+        if start == -1:
+            return False
+
+        body = start + len(CODE_MARKER)
+        end = self.text.find(AUDIO_MARKER, max(body, self._scan))
+        if end == -1:
+            self._scan = max(body, len(self.text) - len(AUDIO_MARKER))
+            return False
+
+        self.code = self.text[body:end].strip()
+        self._audio_start = end + len(AUDIO_MARKER)
+        return True
+
+    def narration(self) -> str:
+        # Everything after the audio marker; only complete once the stream has ended
+        if self._audio_start is None:
+            return ""
+        return self.text[self._audio_start:].strip()
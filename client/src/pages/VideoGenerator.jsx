@@ -25,6 +25,15 @@ const VideoGenerator = () => {
     }
   };
 
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const res = await axios.get(`/jobs/${jobId}`);
+      if (res.data.status === 'completed') return res.data.result;
+      if (res.data.status === 'failed') throw new Error(res.data.error || 'Video generation failed.');
+      await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+  };
+
   const handleGenerate = async (e) => {
     e.preventDefault();
     if (!prompt) return;
@@ -34,9 +43,10 @@ const VideoGenerator = () => {
 
     try {
       const res = await axios.post('/generate-video', { prompt });
+      const result = await waitForJob(res.data.jobId);
       
       const newVideo = {
-        url: res.data.videoUrl,
+        url: result.videoUrl,
         prompt: prompt,
         timestamp: new Date()
       };
@@ -111,6 +121,7 @@ const VideoGenerator = () => {
                   <p className="text-sm font-medium text-gray-700 line-clamp-2">{vid.prompt}</p>
                   <p className="text-xs text-gray-400 mt-1">
                     {vid.timestamp.toLocaleTimeString()}
+                    {vid.tier === 'preview' && ' · Preview (HD on the way)'}
                   </p>
                 </div>
               ))}